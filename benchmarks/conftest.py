@@ -0,0 +1,116 @@
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+from pydantic import BaseModel, SecretStr
+
+from yessql import AioMySQL, AioPostgres, MySQLConfig, Postgres, PostgresConfig
+
+ROWS = int(os.environ.get('YESSQL_BENCH_ROWS', 100_000))
+WRITE_ROWS = int(os.environ.get('YESSQL_BENCH_WRITE_ROWS', 10_000))
+CONCURRENCY = int(os.environ.get('YESSQL_BENCH_CONCURRENCY', 50))
+
+
+class PGBenchConfig(PostgresConfig):
+    host: SecretStr = SecretStr('localhost')
+    user: SecretStr = SecretStr('admin')
+    password: SecretStr = SecretStr('admin')
+    database = 'yessql'
+
+    class Config:
+        env_prefix = 'PG_'
+
+
+class MySQLBenchConfig(MySQLConfig):
+    host: SecretStr = SecretStr('localhost')
+    user: SecretStr = SecretStr('root')
+    password: SecretStr = SecretStr('admin')
+    database = 'yessql'
+
+    class Config:
+        env_prefix = 'MYSQL_'
+
+
+class BenchRow(BaseModel):
+    id: int
+    name: str
+    quantity: int
+    price: float
+    created_at: datetime
+
+
+def bench_rows(n: int, offset: int = 0):
+    now = datetime.now()
+    return [(offset + i, f'name-{i}', i % 100, i / 100, now) for i in range(n)]
+
+
+def slow_consumer(row) -> None:
+    """Simulate per row processing that costs roughly as much as fetching the row"""
+    sum(range(200))
+
+
+@pytest.fixture(scope='session')
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope='session')
+def postgres():
+    pg = Postgres(PGBenchConfig())
+    try:
+        pg.setup_connection()
+    except Exception as err:
+        pytest.skip(f'Postgres is not available for benchmarks: {err}')
+    pg.commit('DROP TABLE IF EXISTS yessql_bench')
+    pg.commit(
+        'CREATE TABLE yessql_bench (id INT PRIMARY KEY, name TEXT, quantity INT, '
+        'price DOUBLE PRECISION, created_at TIMESTAMP)'
+    )
+    pg.commit(
+        'INSERT INTO yessql_bench SELECT i, \'name-\' || i, i % 100, i / 100.0, now() '
+        f'FROM generate_series(1, {ROWS}) AS i'
+    )
+    pg.commit('CREATE TABLE IF NOT EXISTS yessql_bench_writes (LIKE yessql_bench)')
+    yield pg
+    pg.commit('DROP TABLE yessql_bench_writes')
+    pg.commit('DROP TABLE yessql_bench')
+    pg.close_connection()
+
+
+@pytest.fixture(scope='session')
+def aiopostgres(postgres, loop):
+    pg = AioPostgres(PGBenchConfig(), max_size=10)
+    loop.run_until_complete(pg.setup_pool())
+    yield pg
+    loop.run_until_complete(pg.close_pool())
+
+
+@pytest.fixture(scope='session')
+def aiomysql(loop):
+    mysql = AioMySQL(MySQLBenchConfig(), max_size=10)
+    try:
+        loop.run_until_complete(mysql.setup_pool())
+    except Exception as err:
+        pytest.skip(f'MySQL is not available for benchmarks: {err}')
+
+    async def seed():
+        await mysql.commit('DROP TABLE IF EXISTS yessql_bench')
+        await mysql.commit(
+            'CREATE TABLE yessql_bench (id INT PRIMARY KEY, name TEXT, quantity INT, '
+            'price DOUBLE, created_at DATETIME)'
+        )
+        await mysql.commit('CREATE TABLE IF NOT EXISTS yessql_bench_writes LIKE yessql_bench')
+        for offset in range(0, ROWS, 10_000):
+            await mysql.write(
+                'INSERT INTO yessql_bench VALUES (%s, %s, %s, %s, %s)',
+                bench_rows(min(10_000, ROWS - offset), offset),
+            )
+
+    loop.run_until_complete(seed())
+    yield mysql
+    loop.run_until_complete(mysql.commit('DROP TABLE yessql_bench_writes'))
+    loop.run_until_complete(mysql.commit('DROP TABLE yessql_bench'))
+    loop.run_until_complete(mysql.close_pool())
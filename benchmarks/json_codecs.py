@@ -0,0 +1,61 @@
+"""Compare decoding JSON column values with the standard library json module vs orjson.
+
+Documents are generated to look like a typical JSON column: a handful of nested keys with strings,
+numbers and short lists.
+
+    python benchmarks/json_codecs.py --rows 100000
+"""
+import argparse
+import json
+import time
+from typing import Callable, List
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def make_documents(n: int) -> List[str]:
+    return [
+        json.dumps(
+            {
+                'id': i,
+                'name': f'guitar-{i}',
+                'price': i * 1.5,
+                'tags': ['electric', 'vintage', f'tag-{i % 10}'],
+                'specs': {'strings': 6, 'frets': 22, 'pickups': ['single', 'single', 'humbucker']},
+            }
+        )
+        for i in range(n)
+    ]
+
+
+def decode(loads: Callable, documents: List[str]) -> float:
+    start = time.perf_counter()
+    for document in documents:
+        loads(document)
+    return len(documents) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    documents = make_documents(args.rows)
+    decoders = {'json': json.loads}
+    if HAS_ORJSON:
+        decoders['orjson'] = orjson.loads
+    else:
+        print('orjson is not installed, pip install orjson to compare')
+
+    print(f'{"decoder":<10}{"rows/sec":>16}')
+    for name, loads in decoders.items():
+        print(f'{name:<10}{decode(loads, documents):>16,.0f}')
+
+
+if __name__ == '__main__':
+    main()
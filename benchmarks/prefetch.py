@@ -0,0 +1,73 @@
+"""Compare end-to-end read time with and without prefetching for a slow consumer.
+
+The database is simulated by a generator that sleeps for `--fetch-latency` seconds every
+`--batch-size` rows, and the consumer sleeps for `--work` seconds per row. Without prefetching the
+two are serialized; with prefetching the total should approach whichever of the two is slower.
+
+    python benchmarks/prefetch.py --rows 2000 --batch-size 100 --fetch-latency 0.02 --work 0.0005
+"""
+import argparse
+import asyncio
+import time
+
+from yessql.prefetch import prefetch_rows, prefetch_rows_threaded
+
+
+async def arows(n: int, batch_size: int, latency: float):
+    for i in range(n):
+        if i % batch_size == 0:
+            await asyncio.sleep(latency)
+        yield i
+
+
+def rows(n: int, batch_size: int, latency: float):
+    for i in range(n):
+        if i % batch_size == 0:
+            time.sleep(latency)
+        yield i
+
+
+async def consume_async(source, work: float) -> float:
+    start = time.perf_counter()
+    async for _ in source:
+        time.sleep(work)  # CPU bound work blocks the loop, just like real row processing
+        await asyncio.sleep(0)
+    return time.perf_counter() - start
+
+
+def consume(source, work: float) -> float:
+    start = time.perf_counter()
+    for _ in source:
+        time.sleep(work)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--fetch-latency', type=float, default=0.02)
+    parser.add_argument('--work', type=float, default=0.0005)
+    parser.add_argument('--prefetch', type=int, default=2)
+    args = parser.parse_args()
+    source = (args.rows, args.batch_size, args.fetch_latency)
+
+    results = {
+        'async': asyncio.run(consume_async(arows(*source), args.work)),
+        'async prefetch': asyncio.run(
+            consume_async(
+                prefetch_rows(arows(*source), args.prefetch, args.batch_size), args.work
+            )
+        ),
+        'threaded': consume(rows(*source), args.work),
+        'threaded prefetch': consume(
+            prefetch_rows_threaded(rows(*source), args.prefetch, args.batch_size), args.work
+        ),
+    }
+    print(f'{"mode":<20}{"seconds":>10}')
+    for mode, seconds in results.items():
+        print(f'{mode:<20}{seconds:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
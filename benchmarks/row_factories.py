@@ -0,0 +1,63 @@
+"""Compare the memory and throughput of the row factories in yessql.rows.
+
+Rows are synthesised in the same shape pg8000 hands them to `Postgres.read` (a list per row) so the
+numbers isolate the cost of materialising rows from the cost of fetching them.
+
+    python benchmarks/row_factories.py --rows 1000000 --width 20
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from yessql.rows import RowFactory, dict_row, raw_row, record_row, tuple_row
+
+FACTORIES: Dict[str, RowFactory] = {
+    'dict': dict_row,
+    'tuple': tuple_row,
+    'record': record_row,
+    'raw': raw_row,
+}
+
+
+def make_rows(n: int, width: int) -> List[List]:
+    return [[i * width + col for col in range(width)] for i in range(n)]
+
+
+def throughput(make_row: Callable, rows: List[List]) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        make_row(row)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def bytes_per_row(make_row: Callable, rows: List[List]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    kept = [make_row(row) for row in rows]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(kept)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--width', type=int, default=20)
+    args = parser.parse_args()
+
+    keys = [f'column_{col}' for col in range(args.width)]
+    rows = make_rows(args.rows, args.width)
+
+    print(f'{args.rows:,} rows x {args.width} columns')
+    print(f'{"factory":<10}{"rows/sec":>16}{"bytes/row":>12}')
+    for name, factory in FACTORIES.items():
+        make_row = factory(keys)
+        rate = throughput(make_row, rows)
+        size = bytes_per_row(make_row, rows)
+        print(f'{name:<10}{rate:>16,.0f}{size:>12,.0f}')
+
+
+if __name__ == '__main__':
+    main()
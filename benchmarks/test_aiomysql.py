@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from .conftest import CONCURRENCY, ROWS, WRITE_ROWS, BenchRow, bench_rows
+
+QUERY = 'SELECT * FROM yessql_bench'
+
+
+@pytest.mark.benchmark(group='aiomysql')
+def test_read(benchmark, aiomysql, loop):
+    async def run():
+        async for _ in aiomysql.read(QUERY):
+            pass
+
+    benchmark.pedantic(lambda: loop.run_until_complete(run()), rounds=5)
+
+
+@pytest.mark.benchmark(group='aiomysql')
+def test_read_all(benchmark, aiomysql, loop):
+    rows = benchmark.pedantic(lambda: loop.run_until_complete(aiomysql.read_all(QUERY)), rounds=5)
+    assert len(rows) == ROWS
+
+
+@pytest.mark.benchmark(group='aiomysql')
+def test_read_model(benchmark, aiomysql, loop):
+    benchmark.pedantic(
+        lambda: loop.run_until_complete(aiomysql.read_all(QUERY, model=BenchRow)), rounds=5
+    )
+
+
+@pytest.mark.benchmark(group='aiomysql')
+def test_write(benchmark, aiomysql, loop):
+    rows = bench_rows(WRITE_ROWS)
+    stmt = 'INSERT INTO yessql_bench_writes VALUES (%s, %s, %s, %s, %s)'
+
+    def setup():
+        loop.run_until_complete(aiomysql.commit('TRUNCATE yessql_bench_writes'))
+
+    benchmark.pedantic(
+        lambda: loop.run_until_complete(aiomysql.write(stmt, rows)), setup=setup, rounds=3
+    )
+
+
+@pytest.mark.benchmark(group='aiomysql')
+def test_pool_contention(benchmark, aiomysql, loop):
+    async def run():
+        await asyncio.gather(
+            *(
+                aiomysql.read_all('SELECT * FROM yessql_bench WHERE id = %s', (i,))
+                for i in range(CONCURRENCY)
+            )
+        )
+
+    benchmark.pedantic(lambda: loop.run_until_complete(run()), rounds=10)
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from .conftest import CONCURRENCY, ROWS, WRITE_ROWS, BenchRow, bench_rows, slow_consumer
+
+QUERY = 'SELECT * FROM yessql_bench'
+COLUMNS = ('id', 'name', 'quantity', 'price', 'created_at')
+
+
+@pytest.mark.benchmark(group='aiopostgres')
+def test_read(benchmark, aiopostgres, loop):
+    async def run():
+        async for _ in aiopostgres.read(QUERY):
+            pass
+
+    benchmark.pedantic(lambda: loop.run_until_complete(run()), rounds=5)
+
+
+@pytest.mark.benchmark(group='aiopostgres-slow-consumer')
+@pytest.mark.parametrize('prefetch', [0, 4])
+def test_read_slow_consumer(benchmark, aiopostgres, loop, prefetch):
+    async def run():
+        async with aiopostgres.read(QUERY, prefetch=prefetch, batch_size=500) as rows:
+            async for row in rows:
+                slow_consumer(row)
+                await asyncio.sleep(0)
+
+    benchmark.pedantic(lambda: loop.run_until_complete(run()), rounds=3)
+
+
+@pytest.mark.benchmark(group='aiopostgres')
+def test_read_all(benchmark, aiopostgres, loop):
+    rows = benchmark.pedantic(
+        lambda: loop.run_until_complete(aiopostgres.read_all(QUERY)), rounds=5
+    )
+    assert len(rows) == ROWS
+
+
+@pytest.mark.benchmark(group='aiopostgres')
+def test_read_model(benchmark, aiopostgres, loop):
+    benchmark.pedantic(
+        lambda: loop.run_until_complete(aiopostgres.read_all(QUERY, model=BenchRow)), rounds=5
+    )
+
+
+@pytest.mark.benchmark(group='aiopostgres')
+def test_write(benchmark, aiopostgres, loop):
+    rows = [dict(zip(COLUMNS, row)) for row in bench_rows(WRITE_ROWS)]
+    stmt = (
+        'INSERT INTO yessql_bench_writes '
+        'VALUES (${id}, ${name}, ${quantity}, ${price}, ${created_at})'
+    )
+
+    def setup():
+        loop.run_until_complete(aiopostgres.commit('TRUNCATE yessql_bench_writes'))
+
+    benchmark.pedantic(
+        lambda: loop.run_until_complete(aiopostgres.write(stmt, rows)), setup=setup, rounds=3
+    )
+
+
+@pytest.mark.benchmark(group='aiopostgres')
+def test_pool_contention(benchmark, aiopostgres, loop):
+    async def run():
+        await asyncio.gather(
+            *(
+                aiopostgres.read_all('SELECT * FROM yessql_bench WHERE id = ${id}', {'id': i})
+                for i in range(CONCURRENCY)
+            )
+        )
+
+    benchmark.pedantic(lambda: loop.run_until_complete(run()), rounds=10)
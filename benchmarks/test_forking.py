@@ -0,0 +1,42 @@
+import multiprocessing
+import os
+from typing import Optional
+
+import pytest
+
+from yessql import Postgres
+
+from .conftest import ROWS
+
+PROCESSES = int(os.environ.get('YESSQL_BENCH_PROCESSES', os.cpu_count() or 2))
+QUERY = 'SELECT * FROM yessql_bench'
+
+# Set in each worker to the client the parent connected before forking, which it then reconnects
+_client: Optional[Postgres] = None
+
+
+def inherit_client(client: Postgres) -> None:
+    global _client
+    _client = client
+
+
+def read_in_worker(_) -> int:
+    assert _client is not None
+    return sum(1 for _ in _client.read(QUERY))
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+@pytest.mark.benchmark(group='postgres-forked')
+@pytest.mark.parametrize('processes', [1, PROCESSES])
+def test_forked_reads(benchmark, postgres, processes):
+    """Total read throughput when a client connected in the parent is shared by forked workers"""
+    context = multiprocessing.get_context('fork')
+
+    def run():
+        with context.Pool(processes, inherit_client, (postgres,)) as pool:
+            return pool.map(read_in_worker, range(processes * 2))
+
+    counts = benchmark.pedantic(run, rounds=3)
+    assert counts == [ROWS] * processes * 2
+    # the parent's connection must still be usable after the children have come and gone
+    assert postgres.read_all('SELECT 1 AS one') == [{'one': 1}]
@@ -0,0 +1,78 @@
+"""yessql's own overhead, measured against the in-memory fakes in yessql.fakes.
+
+These need no database so they also run in CI. Every read returns the same synthetic rows as the
+benchmark tables and there is no simulated latency, so the timings are almost entirely yessql (and
+the row types it builds).
+"""
+from datetime import datetime
+
+import pytest
+
+from yessql import AioMySQL, AioPostgres, Postgres, record_row
+from yessql.fakes import FakeDatabase
+
+from .conftest import ROWS, WRITE_ROWS, BenchRow, MySQLBenchConfig, PGBenchConfig, bench_rows
+
+QUERY = 'SELECT * FROM yessql_bench'
+COLUMNS = ('id', 'name', 'quantity', 'price', 'created_at')
+NOW = datetime.now()
+
+
+@pytest.fixture(scope='module')
+def fake_db():
+    return FakeDatabase(COLUMNS, ROWS, row=lambda i: (i, f'name-{i}', i % 100, i / 100, NOW))
+
+
+@pytest.fixture(scope='module')
+def fake_aiopostgres(fake_db, loop):
+    pg = fake_db.attach(AioPostgres(PGBenchConfig()))
+    loop.run_until_complete(pg.setup_pool())
+    yield pg
+    loop.run_until_complete(pg.close_pool())
+
+
+@pytest.fixture(scope='module')
+def fake_aiomysql(fake_db, loop):
+    mysql = fake_db.attach(AioMySQL(MySQLBenchConfig()))
+    loop.run_until_complete(mysql.setup_pool())
+    yield mysql
+    loop.run_until_complete(mysql.close_pool())
+
+
+@pytest.fixture(scope='module')
+def fake_postgres(fake_db):
+    with fake_db.attach(Postgres(PGBenchConfig())) as pg:
+        yield pg
+
+
+@pytest.mark.benchmark(group='overhead-aiopostgres')
+@pytest.mark.parametrize('row_factory', [None, record_row])
+def test_aiopostgres_read_all(benchmark, fake_aiopostgres, loop, row_factory):
+    fake_aiopostgres.row_factory = row_factory
+    rows = benchmark(lambda: loop.run_until_complete(fake_aiopostgres.read_all(QUERY)))
+    fake_aiopostgres.row_factory = None
+    assert len(rows) == ROWS
+
+
+@pytest.mark.benchmark(group='overhead-aiopostgres')
+def test_aiopostgres_read_model(benchmark, fake_aiopostgres, loop):
+    benchmark(lambda: loop.run_until_complete(fake_aiopostgres.read_all(QUERY, model=BenchRow)))
+
+
+@pytest.mark.benchmark(group='overhead-aiopostgres')
+def test_aiopostgres_write(benchmark, fake_aiopostgres, loop):
+    stmt = f'INSERT INTO yessql_bench VALUES ({", ".join("${" + c + "}" for c in COLUMNS)})'
+    params = [dict(zip(COLUMNS, row)) for row in bench_rows(WRITE_ROWS)]
+    benchmark(lambda: loop.run_until_complete(fake_aiopostgres.write(stmt, params)))
+
+
+@pytest.mark.benchmark(group='overhead-aiomysql')
+def test_aiomysql_read_all(benchmark, fake_aiomysql, loop):
+    rows = benchmark(lambda: loop.run_until_complete(fake_aiomysql.read_all(QUERY)))
+    assert len(rows) == ROWS
+
+
+@pytest.mark.benchmark(group='overhead-postgres')
+def test_postgres_read_all(benchmark, fake_postgres):
+    rows = benchmark(fake_postgres.read_all, QUERY)
+    assert len(rows) == ROWS
@@ -0,0 +1,29 @@
+import pytest
+
+from yessql import NamedParams, NamedParamsList
+
+from .conftest import WRITE_ROWS, bench_rows
+
+STMT = 'INSERT INTO t VALUES (${id}, ${name}, ${quantity}, ${price}, ${created_at})'
+COLUMNS = ('id', 'name', 'quantity', 'price', 'created_at')
+
+
+@pytest.fixture(scope='module')
+def write_params():
+    return [dict(zip(COLUMNS, row)) for row in bench_rows(WRITE_ROWS)]
+
+
+@pytest.mark.benchmark(group='params')
+def test_named_params_list(benchmark, write_params):
+    def run():
+        params = NamedParamsList(write_params)
+        params.format_map(STMT)
+        params.as_tuples()
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group='params')
+def test_named_params(benchmark):
+    query = 'SELECT * FROM t WHERE id = ${id} AND name = ${name}'
+    benchmark(lambda: query.format_map(NamedParams(id=1, name='name-1')))
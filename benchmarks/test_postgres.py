@@ -0,0 +1,67 @@
+import pytest
+
+from .conftest import ROWS, WRITE_ROWS, BenchRow, bench_rows, slow_consumer
+
+QUERY = 'SELECT * FROM yessql_bench'
+
+
+@pytest.mark.benchmark(group='postgres')
+def test_read(benchmark, postgres):
+    def run():
+        for _ in postgres.read(QUERY):
+            pass
+
+    benchmark.pedantic(run, rounds=5)
+
+
+@pytest.mark.benchmark(group='postgres-slow-consumer')
+@pytest.mark.parametrize('prefetch', [0, 4])
+def test_read_slow_consumer(benchmark, postgres, prefetch):
+    def run():
+        for row in postgres.read(QUERY, prefetch=prefetch, batch_size=500):
+            slow_consumer(row)
+
+    benchmark.pedantic(run, rounds=3)
+
+
+@pytest.mark.benchmark(group='postgres')
+def test_read_all(benchmark, postgres):
+    rows = benchmark.pedantic(postgres.read_all, args=(QUERY,), rounds=5)
+    assert len(rows) == ROWS
+
+
+@pytest.mark.benchmark(group='postgres')
+def test_read_model(benchmark, postgres):
+    def run():
+        return [BenchRow(**row) for row in postgres.read(QUERY)]
+
+    benchmark.pedantic(run, rounds=5)
+
+
+@pytest.mark.benchmark(group='postgres')
+def test_write(benchmark, postgres):
+    rows = bench_rows(WRITE_ROWS)
+
+    def run():
+        postgres.write('INSERT INTO yessql_bench_writes VALUES (%s, %s, %s, %s, %s)', rows)
+
+    benchmark.pedantic(
+        run, setup=lambda: postgres.commit('TRUNCATE yessql_bench_writes'), rounds=3
+    )
+
+
+@pytest.mark.benchmark(group='postgres-write')
+@pytest.mark.parametrize('batch_size', [None, 1000])
+def test_write_batched(benchmark, postgres, batch_size):
+    rows = bench_rows(WRITE_ROWS)
+
+    def run():
+        postgres.write(
+            'INSERT INTO yessql_bench_writes VALUES (%s, %s, %s, %s, %s)',
+            rows,
+            batch_size=batch_size,
+        )
+
+    benchmark.pedantic(
+        run, setup=lambda: postgres.commit('TRUNCATE yessql_bench_writes'), rounds=3
+    )
@@ -16,6 +16,7 @@ setup(
     author='Mitchell Lisle',
     author_email='m.lisle90@gmail.com',
     description='An easy to use python SQL database interface for Postgres and MySQL',
+    extras_require={'orjson': ['orjson']},
     install_requires=requirements,
     include_package_data=True,
     keywords='yessql',
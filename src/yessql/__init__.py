@@ -2,11 +2,70 @@ __version__ = '0.2.3'
 __author__ = 'Mitchell Lisle'
 __email__ = 'm.lisle90@gmail.com'
 
+from importlib import import_module
 
-from yessql.aiomysql import AioMySQL
-from yessql.aiopostgres.client import AioPostgres
-from yessql.aiopostgres.params import NamedParams, NamedParamsList
-from yessql.config import DatabaseConfig, MySQLConfig, PostgresConfig
+# logger shares its name with its module, so it has to be bound eagerly. Otherwise importing the
+# yessql.logger submodule would replace the logger attribute with the module itself.
 from yessql.logger import logger
-from yessql.postgres import ContextCursor, Postgres
-from yessql.utils import PendingConnection, PendingConnectionError
+
+# Everything is imported on first use so that `import yessql` doesn't pay for importing drivers
+# (aiomysql, asyncpg, pg8000) that a process may never use. We also avoid importing typing here for
+# the same reason, hence the string annotations and TYPE_CHECKING flag.
+TYPE_CHECKING = False
+
+_LAZY = {
+    'AioMySQL': 'yessql.aiomysql',
+    'AioPostgres': 'yessql.aiopostgres.client',
+    'MySQLCodec': 'yessql.codecs',
+    'PostgresCodec': 'yessql.codecs',
+    'NamedParams': 'yessql.aiopostgres.params',
+    'NamedParamsList': 'yessql.aiopostgres.params',
+    'DatabaseConfig': 'yessql.config',
+    'MySQLConfig': 'yessql.config',
+    'PostgresConfig': 'yessql.config',
+    'Lane': 'yessql.lanes',
+    'Page': 'yessql.pagination',
+    'ContextCursor': 'yessql.postgres',
+    'Postgres': 'yessql.postgres',
+    'QueryProfiler': 'yessql.profiler',
+    'dict_row': 'yessql.rows',
+    'raw_row': 'yessql.rows',
+    'record_row': 'yessql.rows',
+    'tuple_row': 'yessql.rows',
+    'Subscription': 'yessql.subscriptions',
+    'PendingConnection': 'yessql.utils',
+    'PendingConnectionError': 'yessql.utils',
+    'WriteBehind': 'yessql.writebehind',
+}
+
+__all__ = ['logger', *_LAZY]
+
+
+def __getattr__(name: str) -> 'Any':
+    if name not in _LAZY:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> 'List[str]':
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from typing import Any, List
+
+    from yessql.aiomysql import AioMySQL
+    from yessql.aiopostgres.client import AioPostgres
+    from yessql.aiopostgres.params import NamedParams, NamedParamsList
+    from yessql.codecs import MySQLCodec, PostgresCodec
+    from yessql.config import DatabaseConfig, MySQLConfig, PostgresConfig
+    from yessql.lanes import Lane
+    from yessql.pagination import Page
+    from yessql.postgres import ContextCursor, Postgres
+    from yessql.profiler import QueryProfiler
+    from yessql.rows import dict_row, raw_row, record_row, tuple_row
+    from yessql.subscriptions import Subscription
+    from yessql.utils import PendingConnection, PendingConnectionError
+    from yessql.writebehind import WriteBehind
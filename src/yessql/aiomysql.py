@@ -1,11 +1,22 @@
+import asyncio
 from abc import ABC
-from typing import AsyncGenerator, Tuple, Type, Union
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import AsyncGenerator, AsyncIterator, Dict, Optional, Sequence, Tuple, Type, Union
 
 import aiomysql as mysql
 from pydantic import BaseModel
+from pymysql.converters import decoders
 
 from yessql.clients import AsyncDatabaseClient
+from yessql.codecs import MySQLCodec
 from yessql.config import MySQLConfig
+from yessql.deadlines import with_timeout
+from yessql.lanes import Lane
+from yessql.logger import logger
+from yessql.profiler import QueryProfiler, counted, timed
+from yessql.rows import RowFactory
+from yessql.streams import aclosing
 from yessql.utils import PendingConnection
 
 
@@ -16,11 +27,36 @@ class AioMySQL(AsyncDatabaseClient, ABC):
         cursor_class: mysql.Cursor = mysql.SSDictCursor,
         min_size: int = 1,
         max_size: int = 10,
+        row_factory: RowFactory = None,
+        profiler: QueryProfiler = None,
+        lanes: Sequence[Lane] = None,
+        codecs: Sequence[MySQLCodec] = None,
+        connection_budget: int = None,
     ):
+        """
+        Args:
+            config: a MySQLConfig object that contains all the connection details for MySQL
+            cursor_class: The aiomysql cursor used for reads. Ignored when a row_factory is given
+                since row factories always work from unbuffered tuple rows
+            min_size: The minimum # of connections that will be reserved for this client
+            max_size: The maximum # of connections that will be reserved for this client
+            row_factory: Controls the type of rows returned by `read`, see yessql.rows
+            profiler: An optional QueryProfiler used to record timings for every query
+            lanes: Optional priority lanes for sharing the pool between different workloads. See
+                yessql.lanes.Lane
+            codecs: Optional custom decoders for column types, E.g.
+                yessql.codecs.mysql_json_codecs() to decode JSON columns
+            connection_budget: The total # of connections the pools of every process may open
+                together. When set, max_size is replaced by this process' share of the budget (see
+                yessql.forking.per_process_pool_size)
+        """
         self.pool: Union[mysql.Pool, PendingConnection] = PendingConnection()
         self.config: MySQLConfig = config
         self.cursor_class: mysql.Cursor = cursor_class
-        super().__init__(config, min_size, max_size)
+        self.codecs = list(codecs or ())
+        super().__init__(
+            config, min_size, max_size, row_factory, profiler, lanes, connection_budget
+        )
 
     async def setup_pool(self):
         """Setup Connection Pool
@@ -43,67 +79,148 @@ class AioMySQL(AsyncDatabaseClient, ABC):
             port=self.config.port,
             minsize=self.min_size,
             maxsize=self.max_size,
+            conv=self.converters(),
         )
 
-    async def read(
-        self, query: str, params: Tuple = None, model: Type[BaseModel] = None
+    def converters(self) -> Dict:
+        """The decoders passed to aiomysql, which are pymysql's defaults overridden by our codecs"""
+        return {**decoders, **{codec.field_type: codec.decoder for codec in self.codecs}}
+
+    async def _read(
+        self,
+        query: str,
+        params: Tuple = None,
+        model: Type[BaseModel] = None,
+        lane: str = None,
+        row_factory: RowFactory = None,
     ) -> AsyncGenerator:
+        cursor_class = self.cursor_class if model or not self.row_factory else mysql.SSCursor
+        async with self.acquire(lane) as conn:
+            async with self.cursor(conn, cursor_class) as cur:
+                started = perf_counter()
+                await cur.execute(query, params)
+                keys = [col[0] for col in cur.description or ()]
+                make_row = self.row_maker(keys, model, row_factory)
+                async with aclosing(self.iter_rows(query, cur, make_row, started)) as rows:
+                    async for row in rows:
+                        yield row
+        self.capture_plan(query, params)
+
+    async def explain(self, query: str, params: Tuple) -> str:
+        async with self.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(f'EXPLAIN ANALYZE {query}', params)
+                rows = await cur.fetchall()
+        return '\n'.join(row[0] for row in rows)
+
+    @asynccontextmanager
+    async def cursor(
+        self, conn: mysql.Connection, cursor_class: mysql.Cursor = mysql.Cursor
+    ) -> AsyncIterator[mysql.Cursor]:
         """
-        Read results from postgres and return an AsyncGenerator. This allows you to read large
-        amounts of data without having to store them in memory.
+        Open a cursor on conn that is safe to cancel part way through a query (E.g. because it timed
+        out), or to stop reading an unbuffered result part way through (E.g. breaking out of a
+        `read`). Either leaves the connection in the middle of a response, and the query still
+        running on the server, so rather than closing the cursor (which would read the rest of the
+        response) we close the connection, so that the pool discards it, and kill the query.
         Args:
-            query: The query you want to return data for
-            params: Any params you need to pass to the query
-            model: An optional pydantic.BaseModel we'll use as the row return type
+            conn: The connection to open the cursor on
+            cursor_class: The aiomysql cursor class to use
 
         Returns:
-            An AsyncGenerator
+            An async context manager that yields the cursor
         """
-        async with self.pool.acquire() as conn:  # type: ignore
-            async with conn.cursor(self.cursor_class) as cur:
-                await cur.execute(query, params)
-                async for row in cur:
-                    if model:
-                        yield model(**row)
-                    else:
-                        yield row
-
-    async def write(self, stmt: str, params: Union[Tuple, str, int]) -> None:
+        cur = await conn.cursor(cursor_class)
+        try:
+            yield cur
+        except BaseException as err:
+            if isinstance(err, asyncio.CancelledError) or _unfinished(cur):
+                await self.abandon(conn)
+            else:
+                await cur.close()
+            raise
+        await cur.close()
+
+    async def abandon(self, conn: mysql.Connection) -> None:
+        """Close conn without reading the rest of its response and kill the query it is running"""
+        thread_id = conn.thread_id()
+        conn.close()
+        await self.kill_query(thread_id)
+
+    async def kill_query(self, thread_id: int) -> None:
+        """Kill the query running on the connection with the given thread id.
+
+        This uses a new connection rather than one from the pool, since the pool may well be
+        exhausted by the time queries need to be killed.
+        """
+        try:
+            conn = await mysql.connect(
+                host=self.config.host.get_secret_value(),
+                user=self.config.user.get_secret_value(),
+                password=self.config.password.get_secret_value(),
+                db=self.config.database,
+                port=self.config.port,
+            )
+            try:
+                async with conn.cursor() as cur:
+                    await cur.execute('KILL QUERY %s', (thread_id,))
+            finally:
+                conn.close()
+        except Exception:
+            logger.exception(f'Unable to kill query on connection {thread_id}')
+
+    async def write(
+        self, stmt: str, params: Union[Tuple, str, int], lane: str = None, timeout: float = None
+    ) -> None:
         """
         Write data to a table with the given statement and data
         Args:
             stmt: The Insert statement you want to run
             params: The data to pass as params
+            lane: The name of the lane to acquire a connection from, if lanes are configured
+            timeout: Raise asyncio.TimeoutError if the write takes longer than this many seconds.
+                The statement is killed and its connection closed rather than returned to the pool
 
         Returns:
             None
         """
-        async with self.pool.acquire() as conn:  # type: ignore
-            async with conn.cursor() as cur:
-                await cur.executemany(stmt, params)
-            await conn.commit()
+        await with_timeout(self._write(stmt, params, lane), timeout)
 
-    async def commit(self, stmt: str):
+    async def _write(self, stmt: str, params: Union[Tuple, str, int], lane: Optional[str]) -> None:
+        async with self.acquire(lane) as conn:
+            async with self.cursor(conn) as cur:
+                params = counted(self.profiler, params)
+                with timed(self.profiler, stmt, params):
+                    await cur.executemany(stmt, params)
+                    await conn.commit()
+
+    async def commit(self, stmt: str, lane: str = None, timeout: float = None):
         """
         Run a command against the database. This is useful for statements where you need to change
         the database in some way E.g. ALTER, CREATE, DROP statements etc.
         Args:
             stmt: The statement to run
+            lane: The name of the lane to acquire a connection from, if lanes are configured
+            timeout: Raise asyncio.TimeoutError if the statement takes longer than this many
+                seconds. The statement is killed and its connection closed
         """
-        async with self.pool.acquire() as conn:  # type: ignore
-            async with conn.cursor() as cur:
-                await cur.execute(stmt)
-            await conn.commit()
-
-    async def close_pool(self) -> None:
-        """Close Connection Pool
-
-        Close the connection pool. If you're running this class inside a context manager (which you
-        should be) then this will get called as part of exiting the context.
-
-        Returns:
-            None
-
-        """
+        await with_timeout(self._commit(stmt, lane), timeout)
+
+    async def _commit(self, stmt: str, lane: Optional[str]) -> None:
+        async with self.acquire(lane) as conn:
+            async with self.cursor(conn) as cur:
+                with timed(self.profiler, stmt):
+                    await cur.execute(stmt)
+                    await conn.commit()
+
+    async def _close_pool(self) -> None:
+        if self.forget_inherited_pool():
+            return
         self.pool.close()
         await self.pool.wait_closed()
+
+
+def _unfinished(cur: mysql.Cursor) -> bool:
+    """Whether cur is an unbuffered (SS) cursor with rows still to be read from the server"""
+    result = getattr(cur, '_result', None)
+    return bool(getattr(result, 'unbuffered_active', False))
@@ -1,17 +1,34 @@
-from typing import AsyncGenerator, Dict, List, Type, Union
+from time import perf_counter
+from typing import AsyncGenerator, Dict, List, Optional, Sequence, Tuple, Type, Union
 
-from asyncpg import Pool, create_pool
+from asyncpg import Connection, Pool, create_pool
 from pydantic import BaseModel
 
 from yessql.aiopostgres.params import NamedParams, NamedParamsList
 from yessql.clients import AsyncDatabaseClient
+from yessql.codecs import PostgresCodec
 from yessql.config import PostgresConfig
+from yessql.deadlines import with_timeout
+from yessql.lanes import Lane
+from yessql.profiler import QueryProfiler, timed
+from yessql.rows import RowFactory, keyed_row
+from yessql.streams import aclosing
+from yessql.subscriptions import Subscription
 from yessql.utils import PendingConnection
 
 
 class AioPostgres(AsyncDatabaseClient):
     def __init__(
-        self, config: PostgresConfig, timeout: int = None, min_size: int = 1, max_size: int = 10
+        self,
+        config: PostgresConfig,
+        timeout: int = None,
+        min_size: int = 1,
+        max_size: int = 10,
+        row_factory: RowFactory = None,
+        profiler: QueryProfiler = None,
+        lanes: Sequence[Lane] = None,
+        codecs: Sequence[PostgresCodec] = None,
+        connection_budget: int = None,
     ):
         """
         AioPostgres is an async postgres client that allows you to set up a connection pool for
@@ -22,11 +39,25 @@ class AioPostgres(AsyncDatabaseClient):
             timeout: max time before a query is cancelled
             min_size: The minimum # of connections that will be reserved for this client
             max_size: The maximum # of connections that will be reserved for this client
+            row_factory: Controls the type of rows returned by `read`. By default we return
+                asyncpg Records, see yessql.rows for the alternatives
+            profiler: An optional QueryProfiler used to record timings for every query
+            lanes: Optional priority lanes for sharing the pool between different workloads. See
+                yessql.lanes.Lane
+            codecs: Optional custom type codecs registered on every connection in the pool, E.g.
+                yessql.codecs.postgres_json_codecs() to decode json/jsonb columns
+            connection_budget: The total # of connections the pools of every process may open
+                together. When set, max_size is replaced by this process' share of the budget (see
+                yessql.forking.per_process_pool_size)
         """
         self.pool: Union[PendingConnection, Pool] = PendingConnection()
         self.config: PostgresConfig = config
         self.timeout = timeout
-        super().__init__(config, min_size, max_size)
+        self.codecs = list(codecs or ())
+        self.subscriptions: List[Subscription] = []
+        super().__init__(
+            config, min_size, max_size, row_factory, profiler, lanes, connection_budget
+        )
 
     @property
     def closed(self) -> bool:
@@ -42,57 +73,146 @@ class AioPostgres(AsyncDatabaseClient):
             command_timeout=self.timeout,
             min_size=self.min_size,
             max_size=self.max_size,
+            init=self.init_connection if self.codecs else None,
         )
 
-    async def close_pool(self) -> None:
-        """Close Connection Pool
+    async def init_connection(self, conn: Connection) -> None:
+        """Register our type codecs on a new connection. Called by the pool for every connection"""
+        for codec in self.codecs:
+            await conn.set_type_codec(
+                codec.typename,
+                encoder=codec.encoder,
+                decoder=codec.decoder,
+                schema=codec.schema,
+                format=codec.format,
+            )
 
-        Close the connection pool. If you're running this class inside a context manager (which you
-        should be) then this will get called as part of exiting the context.
+    def after_fork(self) -> None:
+        for subscription in self.subscriptions:
+            subscription.after_fork()
+        self.subscriptions = []
+        super().after_fork()
 
-        Returns:
-            None
+    async def _close_pool(self) -> None:
+        for subscription in self.subscriptions:
+            await subscription.aclose()
+        self.subscriptions = []
+        if self.forget_inherited_pool():
+            return
+        await self.pool.close()  # type: ignore
 
+    def subscribe(
+        self,
+        channel: str,
+        model: Type[BaseModel] = None,
+        batch_size: int = 1,
+        batch_window: float = 0.0,
+        lane: str = None,
+    ) -> Subscription:
         """
-        await self.pool.close()  # type: ignore
+        Subscribe to the notifications sent to a channel with NOTIFY (or pg_notify), E.g. from a
+        trigger, rather than polling a table for changes. The subscription holds a connection from
+        the pool until it is closed, and reconnects (and LISTENs again) if the connection is lost.
+
+            async with pg.subscribe('guitars', model=Guitar, batch_size=100) as batches:
+                async for guitars in batches:
+                    ...
+
+        Args:
+            channel: The channel to LISTEN on
+            model: An optional pydantic.BaseModel each JSON payload is decoded into. Without a model
+                payloads are yielded as strings
+            batch_size: Yield lists of up to this many notifications rather than one at a time, so
+                that bursts can be handled together
+            batch_window: When batching, the # of seconds to wait for more notifications after the
+                first one before yielding a batch that isn't full
+            lane: The name of the lane to acquire the connection from, if lanes are configured
 
-    async def read(
-        self, query: str, params: Dict = None, model: Type[BaseModel] = None
+        Returns:
+            A Subscription, which can be used with `async for` and `async with`
+        """
+        subscription = Subscription(self, channel, model, batch_size, batch_window, lane)
+        self.subscriptions = [s for s in self.subscriptions if not s.closed] + [subscription]
+        return subscription
+
+    async def _read(
+        self,
+        query: str,
+        params: Dict = None,
+        model: Type[BaseModel] = None,
+        lane: str = None,
+        row_factory: RowFactory = None,
     ) -> AsyncGenerator:
         _params = NamedParams(**params) if params is not None else None
         _query = query.format_map(_params)
+        args = _params.as_tuple if _params else ()
+        row_factory = row_factory or self.row_factory
+        if model is not None or row_factory is None:
+            make_row = self.row_maker((), model)
+        else:
+            make_row = keyed_row(row_factory)
 
-        async with self.pool.acquire() as conn:  # type: ignore
+        async with self.acquire(lane) as conn:
             async with conn.transaction():
-                cur = conn.cursor(_query, *_params.as_tuple) if _params else conn.cursor(_query)
-                async for row in cur:
-                    if model:
-                        yield model(**row)
-                    else:
+                started = perf_counter()
+                cur = conn.cursor(_query, *args)
+                async with aclosing(self.iter_rows(_query, cur, make_row, started)) as rows:
+                    async for row in rows:
                         yield row
+        self.capture_plan(_query, args)
+
+    async def explain(self, query: str, params: Tuple) -> str:
+        async with self.acquire() as conn:
+            rows = await conn.fetch(f'EXPLAIN (ANALYZE, BUFFERS) {query}', *(params or ()))
+        return '\n'.join(row[0] for row in rows)
 
-    async def write(self, stmt: str, params: List[Dict]) -> None:
+    def keyset_params(
+        self, params: Optional[Dict], after: Optional[Tuple]
+    ) -> Tuple[Optional[List[str]], Optional[Dict]]:
+        if after is None:
+            return None, params
+        names = [f'_yessql_after_{i}' for i in range(len(after))]
+        placeholders = ['${' + name + '}' for name in names]
+        return placeholders, {**(params or {}), **dict(zip(names, after))}
+
+    async def write(
+        self, stmt: str, params: List[Dict], lane: str = None, timeout: float = None
+    ) -> None:
         """
         Write data to a table with the given statement and data
         Args:
             stmt: The Insert statement you want to run
             params: The data to pass as params
+            lane: The name of the lane to acquire a connection from, if lanes are configured
+            timeout: Raise asyncio.TimeoutError if the write takes longer than this many seconds.
+                asyncpg cancels the statement on the server and the transaction is rolled back
 
         Returns:
             None
         """
+        await with_timeout(self._write(stmt, params, lane), timeout)
+
+    async def _write(self, stmt: str, params: List[Dict], lane: Optional[str]) -> None:
         _params = NamedParamsList(params) if params is not None else None
         _query = _params.format_map(stmt)
-        async with self.pool.acquire() as conn:  # type: ignore
-            async with conn.transaction():
-                await conn.executemany(_query, _params.as_tuples())
+        async with self.acquire(lane) as conn:
+            with timed(self.profiler, _query, _params.items):
+                async with conn.transaction():
+                    await conn.executemany(_query, _params.as_tuples())
 
-    async def commit(self, stmt: str) -> None:
+    async def commit(self, stmt: str, lane: str = None, timeout: float = None) -> None:
         """
         Run a command against the database. This is useful for statements where you need to change
         the database in some way E.g. ALTER, CREATE, DROP statements etc.
         Args:
             stmt: The statement to run
+            lane: The name of the lane to acquire a connection from, if lanes are configured
+            timeout: Raise asyncio.TimeoutError if the statement takes longer than this many
+                seconds. asyncpg cancels the statement on the server
         """
-        async with self.pool.acquire() as conn:  # type: ignore
-            await conn.execute(stmt)
+        await with_timeout(self._commit(stmt, lane), timeout)
+
+    async def _commit(self, stmt: str, lane: Optional[str]) -> None:
+        async with self.acquire(lane) as conn:
+            with timed(self.profiler, stmt):
+                await conn.execute(stmt)
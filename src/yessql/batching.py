@@ -0,0 +1,59 @@
+import re
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple, Sequence
+
+# Postgres (and pg8000) send the # of bind parameters as a signed 16 bit integer
+MAX_PARAMS = 32767
+
+_VALUES = re.compile(
+    r'^(?P<head>.*\bVALUES\s*)(?P<row>\((?:[^()]|\([^()]*\))*\))(?P<tail>.*)$',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+class ValuesStatement(NamedTuple):
+    """An INSERT ... VALUES (...) statement split around its row of placeholders"""
+
+    head: str
+    row: str
+    tail: str
+    params_per_row: int
+
+    def rows_per_statement(self, batch_size: int) -> int:
+        """The # of rows we can send in one statement without going over MAX_PARAMS"""
+        return max(1, min(batch_size, MAX_PARAMS // self.params_per_row))
+
+    def for_rows(self, n: int) -> str:
+        """Return the statement rewritten to insert n rows at once"""
+        return f'{self.head}{", ".join([self.row] * n)}{self.tail}'
+
+
+def split_values(stmt: str, placeholder: str = '%s') -> ValuesStatement:
+    """
+    Split an INSERT statement around its VALUES row so that it can be rewritten into a multi-row
+    insert. Anything after the row (E.g. ON CONFLICT or RETURNING clauses) is kept.
+    Args:
+        stmt: An INSERT statement with a single VALUES row of placeholders
+        placeholder: The placeholder used for params in the statement
+
+    Returns:
+        A ValuesStatement
+    """
+    match = _VALUES.match(stmt.strip())
+    if match is None:
+        raise ValueError(f'Unable to batch statement, expected INSERT ... VALUES (...): {stmt}')
+    row = match.group('row')
+    params_per_row = row.count(placeholder)
+    if not params_per_row:
+        raise ValueError(f'Unable to batch statement, no {placeholder} placeholders found: {stmt}')
+    return ValuesStatement(match.group('head'), row, match.group('tail'), params_per_row)
+
+
+def batches(rows: Iterable[Sequence], size: int) -> Iterator[List[Sequence]]:
+    """Split rows into lists of at most size rows"""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
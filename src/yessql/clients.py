@@ -1,48 +1,224 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator, Dict, List, NewType, Tuple, Type, Union
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    List,
+    Mapping,
+    NewType,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 from pydantic import BaseModel
 
 from yessql.config import DatabaseConfig
+from yessql.deadlines import Hedger, deadline_rows, with_timeout
+from yessql.forking import inherit, per_process_pool_size, track
+from yessql.lanes import Lane, LaneScheduler
+from yessql.pagination import (
+    OrderBy,
+    Page,
+    decode_token,
+    encode_token,
+    keyset_query,
+    order_columns,
+    page_key,
+    recording_factory,
+)
+from yessql.prefetch import prefetch_rows
+from yessql.logger import logger
+from yessql.profiler import QueryProfiler, normalize_query
+from yessql.rows import RowFactory, RowMaker, raw_row
+from yessql.streams import ReadStream
 from yessql.utils import PendingConnection
+from yessql.writebehind import LAST, Column, Merge, WriteBehind
 
 DatabasePool = NewType('DatabasePool', object)
 
 
 class AsyncDatabaseClient(ABC):
-    def __init__(self, config: DatabaseConfig, min_size: int, max_size: int):
+    # set in child processes after a fork, until the pool has been opened again
+    reconnect: bool
+
+    def __init__(
+        self,
+        config: DatabaseConfig,
+        min_size: int,
+        max_size: int,
+        row_factory: Optional[RowFactory] = None,
+        profiler: Optional[QueryProfiler] = None,
+        lanes: Optional[Sequence[Lane]] = None,
+        connection_budget: Optional[int] = None,
+    ):
+        if connection_budget is not None:
+            max_size = per_process_pool_size(connection_budget)
+            min_size = min(min_size, max_size)
         self.pool: Union[PendingConnection, DatabasePool] = PendingConnection()
         self.config = config
         self.min_size = min_size
         self.max_size = max_size
+        self.row_factory = row_factory
+        self.profiler = profiler
+        self.scheduler = LaneScheduler(max_size, lanes) if lanes else None
+        self.reconnect = False
+        self._reconnecting: Optional[asyncio.Future] = None
+        self.write_behinds: List[WriteBehind] = []
+        self.hedger = Hedger()
+        self._plans: Dict[str, asyncio.Task] = {}
+        track(self)
 
     @abstractmethod
     async def setup_pool(self) -> None:
         pass
 
-    @abstractmethod
     async def close_pool(self) -> None:
-        pass
+        """Close Connection Pool
+
+        Close the connection pool, first writing out anything left in the client's write-behind
+        buffers. If you're running this class inside a context manager (which you should be) then
+        this will get called as part of exiting the context.
+
+        Returns:
+            None
+
+        """
+        try:
+            await self.flush_write_behinds()
+        finally:
+            # close the pool even if writing the buffers failed, E.g. because the database is down
+            await self.wait_for_plans()
+            await self._close_pool()
 
     @abstractmethod
-    async def read(
-        self, query: str, params: Dict = None, model: Type[BaseModel] = None
-    ) -> AsyncGenerator:
+    async def _close_pool(self) -> None:
+        pass
+
+    def acquire(self, lane: str = None) -> AsyncContextManager[Any]:
+        """
+        Acquire a connection from the pool. If the client was created with lanes, the connection is
+        acquired through the lane scheduler so that waiters are served by their lane's priority.
+        Without lanes the lane is ignored.
+        Args:
+            lane: The name of the lane to acquire from or None for the default lane
+
+        Returns:
+            An async context manager that yields a connection
+        """
+        if self.reconnect:
+            return self._acquire_after_fork(lane)
+        if self.scheduler is None:
+            return self.pool.acquire()  # type: ignore
+        return self.scheduler.acquire(self.pool, lane)
+
+    def after_fork(self) -> None:
+        """Called in the child process after a fork.
+
+        The pool was created by the parent and shares its sockets (and event loop) with it, so the
+        child leaves it alone and opens a pool of its own the next time a connection is acquired.
+        """
+        if isinstance(self.pool, PendingConnection):
+            return
+        inherit(self.pool)
+        self.pool = PendingConnection()
+        if self.scheduler is not None:
+            self.scheduler = LaneScheduler(self.max_size, list(self.scheduler.lanes.values()))
+        self.reconnect = True
+        self._reconnecting = None
+        for buffer in self.write_behinds:
+            buffer.after_fork()
+        self._plans = {}
+
+    def forget_inherited_pool(self) -> bool:
+        """Called when closing the pool. Returns True if the pool was inherited from the parent
+        process and never replaced, in which case it belongs to the parent and mustn't be closed"""
+        inherited, self.reconnect = self.reconnect, False
+        return inherited
+
+    @asynccontextmanager
+    async def _acquire_after_fork(self, lane: Optional[str]) -> AsyncIterator[Any]:
+        if self._reconnecting is None:
+            self._reconnecting = asyncio.ensure_future(self.setup_pool())
+        reconnecting = self._reconnecting
+        try:
+            # shielded so that one caller being cancelled doesn't abandon the pool for everyone
+            await asyncio.shield(reconnecting)
+        except BaseException:
+            if reconnecting.done() and self._reconnecting is reconnecting:
+                self._reconnecting = None
+            raise
+        self.reconnect = False
+        async with self.acquire(lane) as conn:
+            yield conn
+
+    def lane_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the acquire statistics (counts and wait times) for every lane"""
+        return self.scheduler.report() if self.scheduler is not None else {}
+
+    def read(
+        self,
+        query: str,
+        params: Union[Dict, Tuple] = None,
+        model: Type[BaseModel] = None,
+        lane: str = None,
+        prefetch: int = 0,
+        batch_size: int = 100,
+        timeout: float = None,
+    ) -> ReadStream:
         """
-        Read results from postgres and return an AsyncGenerator. This allows you to read large
-        amounts of data without having to store them in memory.
+        Read results from the database and return a ReadStream of rows. This lets you read large
+        amounts of data without having to store them in memory. Use the stream as an async context
+        manager to guarantee the connection is released as soon as you stop reading.
         Args:
             query: The query you want to return data for
             params: Any params you need to pass to the query
             model: An optional pydantic.BaseModel that each row will be parsed to
+            lane: The name of the lane to acquire a connection from, if lanes are configured
+            prefetch: Read up to this many batches ahead in a background task while you process the
+                current rows, overlapping database latency with processing. 0 disables this
+            batch_size: The # of rows per prefetched batch
+            timeout: Raise asyncio.TimeoutError if the rows haven't all been read within this many
+                seconds. The query is cancelled on the server and the connection released
 
         Returns:
-            An AsyncGenerator
+            A ReadStream, which can be used with `async for` and `async with`
         """
-        pass
+        rows = self._read(query, params, model, lane)
+        if timeout is not None:
+            rows = deadline_rows(rows, timeout)
+        if prefetch > 0:
+            rows = prefetch_rows(rows, prefetch, batch_size)
+        return ReadStream(rows)
+
+    @abstractmethod
+    async def _read(
+        self,
+        query: str,
+        params: Union[Dict, Tuple, None],
+        model: Optional[Type[BaseModel]],
+        lane: Optional[str],
+        row_factory: Optional[RowFactory] = None,
+    ) -> AsyncGenerator:
+        """The async generator behind `read`. It must release its connection when closed. A
+        row_factory, if given, is used instead of the client's own (see `row_maker`)"""
+        yield
 
     async def read_all(
-        self, query: str, params: Dict = None, model: Type[BaseModel] = None
+        self,
+        query: str,
+        params: Union[Dict, Tuple] = None,
+        model: Type[BaseModel] = None,
+        lane: str = None,
+        timeout: float = None,
+        hedge: bool = False,
     ) -> Union[List[Dict], Type[BaseModel]]:
         """
         In some cases you might want to just return the data without dealing with iteration you can
@@ -52,22 +228,186 @@ class AsyncDatabaseClient(ABC):
             query: The query you want to return data for
             params: Any params you need to pass to the query
             model: An optional pydantic.BaseModel we'll use as the row return type
+            lane: The name of the lane to acquire a connection from, if lanes are configured
+            timeout: Raise asyncio.TimeoutError if the read takes longer than this many seconds. The
+                query is cancelled on the server and the connection released
+            hedge: If the read is still running after the p95 latency of previous hedged reads of
+                the same query, start a duplicate on another connection and return whichever
+                finishes first. See yessql.deadlines.Hedger
 
         Returns:
             A List of Records
         """
-        rows = []
-        async for row in self.read(query=query, params=params, model=model):  # type: ignore
-            rows.append(row)
-        return rows
+        if hedge:
+            read = self.hedger.run(query, lambda: self._read_all(query, params, model, lane))
+            return await with_timeout(read, timeout)
+        return await with_timeout(self._read_all(query, params, model, lane), timeout)
+
+    async def _read_all(
+        self,
+        query: str,
+        params: Union[Dict, Tuple, None],
+        model: Optional[Type[BaseModel]],
+        lane: Optional[str],
+    ) -> Union[List[Dict], Type[BaseModel]]:
+        async with self.read(query=query, params=params, model=model, lane=lane) as stream:
+            return [row async for row in stream]
+
+    async def paginate(
+        self,
+        query: str,
+        order_by: OrderBy,
+        page_size: int = 1000,
+        params: Union[Dict, Tuple] = None,
+        token: str = None,
+        model: Type[BaseModel] = None,
+        lane: str = None,
+    ) -> AsyncGenerator[Page, None]:
+        """
+        Read through a large result set one page at a time using keyset (seek) pagination. Unlike
+        LIMIT/OFFSET every page costs the same to read no matter how deep into the results you are.
+        Each page is read with its own connection checkout so nothing is held open between pages.
+        Args:
+            query: The query to run. It is wrapped in a subquery so shouldn't have its own ORDER BY
+            order_by: Column name(s) from the query output that uniquely order the rows
+            page_size: The maximum # of rows in each page
+            params: Any params you need to pass to the query
+            token: A checkpoint token from a previous Page to resume reading after
+            model: An optional pydantic.BaseModel that each row will be parsed to
+            lane: The name of the lane to acquire connections from, if lanes are configured
+
+        Returns:
+            An AsyncGenerator of Pages. Each Page is a list of rows with a `token` attribute
+        """
+        columns = order_columns(order_by)
+        after = decode_token(token) if token is not None else None
+        keys: List[str] = []
+        row_factory = recording_factory(self.row_factory or raw_row, keys)
+        while True:
+            placeholders, page_params = self.keyset_params(params, after)
+            page_query = keyset_query(query, columns, page_size, placeholders)
+            async with ReadStream(
+                self._read(page_query, page_params, model, lane, row_factory)
+            ) as stream:
+                rows = [row async for row in stream]
+            if not rows:
+                return
+            after = page_key(rows[-1], columns, keys)
+            yield Page(rows, encode_token(after))
+            if len(rows) < page_size:
+                return
+
+    def keyset_params(
+        self, params: Union[Dict, Tuple, None], after: Optional[Tuple]
+    ) -> Tuple[Optional[List[str]], Union[Dict, Tuple, None]]:
+        """Bind the last seen key into the params for the next page.
+
+        Args:
+            params: The params the caller passed to `paginate`
+            after: The key of the last row on the previous page, or None for the first page
+
+        Returns:
+            The placeholders to use for the key in the query and the combined params
+        """
+        # positional `%s` placeholders, which is what most DB-API drivers (E.g. aiomysql) use
+        if after is None:
+            return None, params
+        return ['%s'] * len(after), tuple(params or ()) + tuple(after)
+
+    def row_maker(
+        self,
+        keys: Sequence[str],
+        model: Type[BaseModel] = None,
+        row_factory: Optional[RowFactory] = None,
+    ) -> RowMaker:
+        """Return the callable used to turn driver rows into the rows we yield from `read`.
+
+        A model always takes precedence over the row_factory. Without either, rows are returned
+        exactly as the driver produces them.
+
+        Args:
+            keys: The column names for the result set
+            model: An optional pydantic.BaseModel that each row will be parsed to
+            row_factory: A row factory to use instead of the client's own
+
+        Returns:
+            A callable that accepts a single driver row
+        """
+        if model is not None:
+            return lambda row: model(**row)  # type: ignore
+        return (row_factory or self.row_factory or raw_row)(keys)
+
+    def iter_rows(
+        self, query: str, rows: AsyncIterable, make_row: RowMaker, started: float
+    ) -> AsyncGenerator:
+        """Materialize the rows from a cursor, profiling them if a profiler is set.
+
+        Args:
+            query: The query the rows are for
+            rows: The driver cursor to iterate over
+            make_row: The callable from `row_maker`
+            started: The perf_counter value from just before the query was executed
+
+        Returns:
+            An async generator of rows
+        """
+        if self.profiler is None:
+            return (make_row(row) async for row in rows)
+        return self.profiler.aprofile_rows(query, rows, make_row, started)
+
+    def capture_plan(self, query: str, params: Union[Dict, Tuple, None]) -> None:
+        """
+        Capture the EXPLAIN output for query if the profiler has flagged it as slow. Called once a
+        read has finished; the EXPLAIN runs in a background task so that it neither holds up the
+        read nor counts against its timeout
+        """
+        if self.profiler is None or not self.profiler.needs_plan(query):
+            return
+        key = normalize_query(query)
+        if key not in self._plans:
+            task = asyncio.get_running_loop().create_task(
+                self._capture_plan(self.profiler, query, params)
+            )
+            self._plans[key] = task
+            task.add_done_callback(lambda _: self._plans.pop(key, None))
+
+    async def _capture_plan(
+        self, profiler: QueryProfiler, query: str, params: Union[Dict, Tuple, None]
+    ) -> None:
+        try:
+            profiler.add_plan(query, await self.explain(query, params))
+        except Exception:
+            logger.exception(f'Unable to capture the plan for {normalize_query(query)}')
+
+    async def wait_for_plans(self) -> None:
+        """Wait for any plans still being captured in the background"""
+        await asyncio.gather(*self._plans.values(), return_exceptions=True)
+
+    @abstractmethod
+    async def explain(self, query: str, params: Union[Dict, Tuple, None]) -> str:
+        """
+        Run EXPLAIN ANALYZE for a query and return the plan. Be aware this executes the query.
+        Args:
+            query: The query to explain, exactly as it would be passed to the driver
+            params: The params for the query, exactly as they would be passed to the driver
+
+        Returns:
+            The query plan as text
+        """
+        pass
 
     @abstractmethod
-    async def write(self, stmt: str, params: Tuple) -> None:
+    async def write(
+        self, stmt: str, params: Tuple, lane: str = None, timeout: float = None
+    ) -> None:
         """
         Write data to a table with the given statement and data
         Args:
             stmt: The Insert statement you want to run
             params: The data to pass as params
+            lane: The name of the lane to acquire a connection from, if lanes are configured
+            timeout: Raise asyncio.TimeoutError if the write takes longer than this many seconds.
+                The statement is cancelled on the server and the connection released
 
         Returns:
             None
@@ -75,16 +415,19 @@ class AsyncDatabaseClient(ABC):
         pass
 
     @abstractmethod
-    async def commit(self, stmt: str) -> None:
+    async def commit(self, stmt: str, lane: str = None, timeout: float = None) -> None:
         """
         Run a command against the database. This is useful for statements where you need to change
         the database in some way E.g. ALTER, CREATE, DROP statements etc.
         Args:
             stmt: The statement to run
+            lane: The name of the lane to acquire a connection from, if lanes are configured
+            timeout: Raise asyncio.TimeoutError if the statement takes longer than this many
+                seconds. The statement is cancelled on the server and the connection released
         """
         pass
 
-    def writer(self, stmt: str):
+    def writer(self, stmt: str, lane: str = None):
         """return a writer for the given statement.
 
         Basically just curry's the write method into a coroutine that accepts a batch of parameters
@@ -92,13 +435,71 @@ class AsyncDatabaseClient(ABC):
 
         Args:
             stmt: The Insert statement you want to run
+            lane: The name of the lane to acquire connections from, if lanes are configured
         """
 
         async def writer(batch):
-            await self.write(stmt, batch)
+            await self.write(stmt, batch, lane)
 
         return writer
 
+    def write_behind(
+        self,
+        stmt: str,
+        key: Union[Column, Sequence[Column]],
+        merge: Union[Merge, Mapping[Column, Merge]] = LAST,
+        interval: float = 1.0,
+        max_keys: int = None,
+        lane: str = None,
+    ) -> WriteBehind:
+        """
+        Return a buffer that coalesces rows with the same key in memory and writes them with stmt
+        every `interval` seconds. Anything still buffered is written when the pool is closed.
+
+            hits = pg.write_behind(
+                'INSERT INTO hits (page, n) VALUES (${page}, ${n}) '
+                'ON CONFLICT (page) DO UPDATE SET n = hits.n + EXCLUDED.n',
+                key='page',
+                merge={'n': SUM},
+            )
+            hits.add({'page': '/', 'n': 1})
+
+        Args:
+            stmt: The upsert statement the coalesced rows are written with
+            key: The column(s) that identify rows to coalesce, by name for dict rows or by index for
+                tuple rows
+            merge: A function that merges a buffered row with a new row, or a mapping of column to
+                merge function, see yessql.writebehind. Defaults to keeping the newest row
+            interval: The # of seconds between flushes
+            max_keys: Flush early once this many keys are buffered
+            lane: The name of the lane to write with, if lanes are configured
+
+        Returns:
+            A WriteBehind buffer
+        """
+        buffer = WriteBehind(self, stmt, key, merge, interval, max_keys, lane)
+        self.write_behinds.append(buffer)
+        return buffer
+
+    async def flush_write_behinds(self) -> None:
+        """Close every write behind buffer, writing anything they still hold. Every buffer is closed
+        even if writing another one fails, after which the error is raised"""
+        buffers, self.write_behinds = self.write_behinds, []
+        async with AsyncExitStack() as stack:
+            # callbacks run last in, first out, so push them in reverse to close in order
+            for buffer in reversed(buffers):
+                stack.push_async_callback(buffer.close)
+
+    def hedge_stats(self) -> Dict[str, Any]:
+        """Return how many hedged reads were run, hedged and won by the duplicate read"""
+        return self.hedger.report()
+
+    def write_behind_stats(self) -> List[Dict[str, Any]]:
+        """Return the coalescing and flush statistics for every open write behind buffer"""
+        return [
+            {'stmt': buffer.stmt, **buffer.stats.as_dict()} for buffer in self.write_behinds
+        ]
+
     async def __aenter__(self):
         await self.setup_pool()
         return self
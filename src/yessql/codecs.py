@@ -0,0 +1,87 @@
+import json
+from typing import Any, Callable, List
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:  # pragma: no cover
+    HAS_ORJSON = False
+
+
+def json_loads(data: Any) -> Any:
+    """Decode JSON using orjson when it is installed, falling back to the standard library"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(value: Any) -> str:
+    """Encode JSON using orjson when it is installed, falling back to the standard library"""
+    if HAS_ORJSON:
+        return orjson.dumps(value).decode()
+    return json.dumps(value)
+
+
+class PostgresCodec:
+    """A custom codec for a Postgres type.
+
+    For AioPostgres codecs are registered on every new connection with asyncpg's `set_type_codec`.
+    For the blocking Postgres client only the decoder is used (pg8000 picks encoders by Python type
+    rather than Postgres type) and it is registered with pg8000's `register_in_adapter`.
+
+    Attributes:
+        typename: The name of the Postgres type, E.g. jsonb
+        encoder: Converts a Python value into the text (or binary, see format) representation
+        decoder: Converts the text (or binary) representation into a Python value
+        schema: The schema the type belongs to
+        format: The format asyncpg exchanges values in, either text or binary (pg8000 uses text)
+    """
+
+    def __init__(
+        self,
+        typename: str,
+        encoder: Callable[[Any], Any],
+        decoder: Callable[[Any], Any],
+        schema: str = 'pg_catalog',
+        format: str = 'text',
+    ):
+        self.typename = typename
+        self.encoder = encoder
+        self.decoder = decoder
+        self.schema = schema
+        self.format = format
+
+
+class MySQLCodec:
+    """A custom decoder for a MySQL column type, passed to aiomysql as part of its converters.
+
+    Attributes:
+        field_type: The MySQL field type code, see pymysql.constants.FIELD_TYPE
+        decoder: Converts the value as read from the server into a Python value
+    """
+
+    def __init__(self, field_type: int, decoder: Callable[[Any], Any]):
+        self.field_type = field_type
+        self.decoder = decoder
+
+
+# pymysql.constants.FIELD_TYPE.JSON. Not imported from pymysql so that this module stays driver free
+MYSQL_JSON = 245
+
+
+def postgres_json_codecs() -> List[PostgresCodec]:
+    """Decode json and jsonb columns into Python objects with the fastest JSON library available"""
+    return [
+        PostgresCodec('json', json_dumps, json_loads),
+        PostgresCodec('jsonb', json_dumps, json_loads),
+    ]
+
+
+def mysql_json_codecs() -> List[MySQLCodec]:
+    """Decode JSON columns into Python objects with the fastest JSON library available.
+
+    Notes:
+        MariaDB stores JSON as LONGTEXT and reports it as such, so this only applies to MySQL.
+    """
+    return [MySQLCodec(MYSQL_JSON, json_loads)]
@@ -0,0 +1,186 @@
+import asyncio
+import math
+from collections import deque
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from yessql.profiler import normalize_query
+from yessql.streams import aclosing
+
+T = TypeVar('T')
+
+
+async def with_timeout(awaitable: Awaitable[T], timeout: Optional[float]) -> T:
+    """Await awaitable, cancelling it and raising asyncio.TimeoutError after timeout seconds. A
+    timeout of None waits forever without the overhead of wrapping the awaitable in a task."""
+    if timeout is None:
+        return await awaitable
+    return await asyncio.wait_for(awaitable, timeout)
+
+
+async def deadline_rows(rows: AsyncGenerator, timeout: float) -> AsyncGenerator:
+    """
+    Yield rows until timeout seconds after the first row was requested, at which point the
+    generator being waited on is cancelled (releasing its connection) and asyncio.TimeoutError is
+    raised. The deadline is wall clock time, so time the consumer spends on each row counts too.
+    A single timer is used for the whole stream, so rows cost no more to read than without one.
+    Args:
+        rows: The async generator of rows to put a deadline on
+        timeout: The # of seconds the rows must all be read within
+
+    Returns:
+        An AsyncGenerator yielding the same rows as `rows`
+    """
+    deadline = _Deadline(timeout)
+    try:
+        async with aclosing(rows):
+            while not deadline.expired:
+                try:
+                    row = await deadline.wait(rows.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield row
+            raise asyncio.TimeoutError()
+    finally:
+        deadline.cancel()
+
+
+class _Deadline:
+    """A timer for a stream of rows. When it expires the task waiting on the next row (if there is
+    one) is cancelled and the wait raises asyncio.TimeoutError instead. A consumer busy with a row
+    is never interrupted, it finds `expired` set when it asks for the next one."""
+
+    def __init__(self, timeout: float):
+        self.expired = False
+        self._waiter: Optional[asyncio.Task] = None
+        self._handle = asyncio.get_running_loop().call_later(timeout, self._expire)
+
+    def _expire(self) -> None:
+        self.expired = True
+        if self._waiter is not None:
+            self._waiter.cancel()
+
+    async def wait(self, awaitable: Awaitable[T]) -> T:
+        self._waiter = asyncio.current_task()
+        try:
+            return await awaitable
+        except asyncio.CancelledError:
+            if self.expired and not self._cancelled_elsewhere():
+                raise asyncio.TimeoutError() from None
+            raise
+        finally:
+            self._waiter = None
+
+    def _cancelled_elsewhere(self) -> bool:
+        """Withdraw our cancellation of the waiting task, returning True if it was also cancelled by
+        something else. Task.uncancel is only available (and needed) from Python 3.11"""
+        uncancel = getattr(self._waiter, 'uncancel', None)
+        return uncancel is not None and uncancel() > 0
+
+    def cancel(self) -> None:
+        self._handle.cancel()
+
+
+class Hedger:
+    """**Hedger**
+
+    Decides when a read should be hedged. The latencies of recent hedged reads are kept per
+    (normalized) query and once a query has `min_samples` of them, a read that is still running
+    after the `percentile` latency has a duplicate started on a second connection. Whichever
+    finishes first is used and the other is cancelled.
+
+    Hedging trades extra load on the database for a shorter tail, so only use it for reads that are
+    safe to run twice.
+    """
+
+    def __init__(self, percentile: float = 0.95, samples: int = 1000, min_samples: int = 20):
+        """
+        Args:
+            percentile: The latency percentile after which a duplicate read is started
+            samples: The # of most recent latencies kept per query
+            min_samples: The # of latencies needed for a query before it is hedged
+        """
+        self.percentile = percentile
+        self.samples = samples
+        self.min_samples = min_samples
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.reads = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, query: str, latency: float) -> None:
+        key = normalize_query(query)
+        latencies = self.latencies.get(key)
+        if latencies is None:
+            latencies = self.latencies[key] = deque(maxlen=self.samples)
+        latencies.append(latency)
+
+    def delay(self, query: str) -> Optional[float]:
+        """The # of seconds to wait before hedging a read of query, or None to not hedge it"""
+        latencies = self.latencies.get(normalize_query(query))
+        if latencies is None or len(latencies) < self.min_samples:
+            return None
+        ordered = sorted(latencies)
+        return ordered[math.ceil(self.percentile * len(ordered)) - 1]
+
+    async def run(self, query: str, read: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run read, starting a duplicate of it if it takes longer than the hedging delay for query.
+        Args:
+            query: The query being read, used to look up its latencies
+            read: A callable returning a new awaitable for the read each time it is called
+
+        Returns:
+            The result of whichever read finishes first without an error
+        """
+        loop = asyncio.get_running_loop()
+        self.reads += 1
+        started = loop.time()
+        primary = loop.create_task(self._timed_read(query, read))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.delay(query))
+            if not done:
+                self.hedged += 1
+                tasks.append(loop.create_task(self._timed_read(query, read)))
+            return await self._first_result(tasks)
+        finally:
+            if not primary.done():
+                # the primary lost (or we were cancelled), so record how long it had run for as a
+                # lower bound on its latency. Otherwise slow reads would never be counted
+                self.record(query, loop.time() - started)
+            for task in tasks:
+                task.cancel()
+            await asyncio.wait(tasks)
+
+    async def _timed_read(self, query: str, read: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await read()
+        self.record(query, loop.time() - start)
+        return result
+
+    async def _first_result(self, tasks: List[asyncio.Task]) -> Any:
+        """Return the result of whichever task finishes first without an error. If they all fail
+        the error from the first task (the original read) is raised"""
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not tasks[0]:
+                        self.hedge_wins += 1
+                    return task.result()
+        return tasks[0].result()
+
+    def report(self) -> Dict[str, Any]:
+        return {'reads': self.reads, 'hedged': self.hedged, 'hedge_wins': self.hedge_wins}
@@ -0,0 +1,481 @@
+"""In-memory stand-ins for the database drivers, for measuring yessql's own overhead.
+
+Against a real database the time spent in yessql (rewriting named params, building rows, parsing
+models, the pool and lane wrappers) is hidden by network and server noise. A FakeDatabase serves the
+same synthetic result set for every read, with an optional simulated round trip latency, through
+fakes of the parts of asyncpg, aiomysql and pg8000 that the clients use:
+
+    db = FakeDatabase(columns=10, rows=10_000)
+    pg = db.attach(AioPostgres(PostgresConfig()))
+    async with pg:
+        rows = await pg.read_all('SELECT * FROM table')
+
+None of the drivers are imported here, so the fakes can be used without any of them installed
+(other than the one the client being attached needs).
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+_READS = ('SELECT', 'WITH', 'EXPLAIN', 'SHOW', 'VALUES', 'TABLE')
+_TYPE_OIDS = {'json': 114, 'jsonb': 3802}
+
+
+class FakeDatabase:
+    """**Fake Database**
+
+    Serves a synthetic result set of `rows` rows and `columns` columns for every read and counts
+    (rather than stores) everything written to it. Queries aren't parsed, so every read returns the
+    same rows whatever its WHERE or LIMIT clauses say (and `paginate` would never finish).
+    """
+
+    def __init__(
+        self,
+        columns: Union[int, Sequence[str]] = 5,
+        rows: int = 1000,
+        latency: float = 0.0,
+        row: Callable[[int], Tuple] = None,
+    ):
+        """
+        Args:
+            columns: The # of columns in the result set, or their names
+            rows: The # of rows returned by every read
+            latency: Seconds of simulated latency for every round trip to the "database"
+            row: Builds the values for the row at an index. By default the first column is the index
+                and the rest are short strings
+        """
+        if isinstance(columns, int):
+            columns = [f'column_{i}' for i in range(columns)]
+        self.columns: Tuple[str, ...] = tuple(columns)
+        self.rows = rows
+        self.latency = latency
+        self.row = row or self.default_row
+        self.queries = 0
+        self.written = 0
+        self.killed: List[int] = []
+        self.listeners: Dict[str, List[Tuple[Any, Callable]]] = {}
+        self._result: Optional[List[Tuple]] = None
+
+    def default_row(self, index: int) -> Tuple:
+        return (index, *(f'{name}-{index}' for name in self.columns[1:]))
+
+    @property
+    def result(self) -> List[Tuple]:
+        """The rows returned by every read, built once so that reads cost as little as possible"""
+        if self._result is None:
+            self._result = [self.row(i) for i in range(self.rows)]
+        return self._result
+
+    def is_read(self, query: str) -> bool:
+        return query.lstrip().upper().startswith(_READS)
+
+    async def wait(self) -> None:
+        self.queries += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def wait_blocking(self) -> None:
+        self.queries += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def notify(self, channel: str, payload: str = '') -> None:
+        """Send a notification to every fake asyncpg connection listening on channel"""
+        for conn, callback in list(self.listeners.get(channel, ())):
+            callback(conn, 0, channel, payload)
+
+    def attach(self, client: Any) -> Any:
+        """
+        Make a client use this database instead of a real one. Setting up the client's pool (or
+        connection) gives it a fake one, so `async with client` / `with client` work as usual.
+        Args:
+            client: An AioPostgres, AioMySQL or Postgres client
+
+        Returns:
+            The same client
+        """
+        from yessql.aiomysql import AioMySQL
+        from yessql.aiopostgres.client import AioPostgres
+        from yessql.postgres import Postgres
+
+        if isinstance(client, AioPostgres):
+            self._attach_aiopostgres(client)
+        elif isinstance(client, AioMySQL):
+            self._attach_aiomysql(client)
+        elif isinstance(client, Postgres):
+            self._attach_postgres(client)
+        else:
+            raise TypeError(f'Unable to attach a FakeDatabase to {type(client).__name__}')
+        return client
+
+    def _attach_aiopostgres(self, client: Any) -> None:
+        async def setup_pool() -> None:
+            init = client.init_connection if client.codecs else None
+            client.pool = FakeAsyncpgPool(self, client.max_size, init)
+
+        client.setup_pool = setup_pool
+
+    def _attach_aiomysql(self, client: Any) -> None:
+        async def setup_pool() -> None:
+            client.pool = FakeAiomysqlPool(self, client.max_size)
+
+        async def kill_query(thread_id: int) -> None:
+            self.killed.append(thread_id)
+
+        client.setup_pool = setup_pool
+        client.kill_query = kill_query
+
+    def _attach_postgres(self, client: Any) -> None:
+        def setup_connection() -> None:
+            client.connection = FakePg8000Connection(self)
+            for codec in client.codecs:
+                client.connection.register_in_adapter(client.type_oid(codec), codec.decoder)
+
+        client.setup_connection = setup_connection
+
+
+class FakeRecord:
+    """A row that behaves like an asyncpg Record: indexable by position or column name, iterates
+    over its values and has the keys/values/items/get of a mapping"""
+
+    __slots__ = ('_values', '_index')
+
+    def __init__(self, values: Tuple, index: Dict[str, int]):
+        self._values = values
+        self._index = index
+
+    def __getitem__(self, key: Union[int, str, slice]) -> Any:
+        if isinstance(key, str):
+            return self._values[self._index[key]]
+        return self._values[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __eq__(self, other: Any) -> bool:
+        return tuple(self) == tuple(other)
+
+    def __repr__(self) -> str:
+        return f'<FakeRecord {" ".join(f"{k}={v!r}" for k, v in self.items())}>'
+
+    def keys(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def values(self) -> Iterator:
+        return iter(self._values)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return zip(self._index, self._values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self._index else default
+
+
+class FakeAsyncpgConnection:
+    def __init__(self, db: FakeDatabase, prefetch: int = 50):
+        self.db = db
+        self.prefetch = prefetch
+        self.codecs: Dict[str, Dict[str, Any]] = {}
+        self.closed = False
+        self._termination_listeners: List[Callable] = []
+        self._index = {name: i for i, name in enumerate(db.columns)}
+
+    async def add_listener(self, channel: str, callback: Callable) -> None:
+        self.db.listeners.setdefault(channel, []).append((self, callback))
+
+    async def remove_listener(self, channel: str, callback: Callable) -> None:
+        self.db.listeners[channel].remove((self, callback))
+
+    def add_termination_listener(self, callback: Callable) -> None:
+        self._termination_listeners.append(callback)
+
+    def remove_termination_listener(self, callback: Callable) -> None:
+        self._termination_listeners.remove(callback)
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def terminate(self) -> None:
+        """Drop the connection as if the server had gone away"""
+        self.closed = True
+        for listeners in self.db.listeners.values():
+            listeners[:] = [listener for listener in listeners if listener[0] is not self]
+        for callback in self._termination_listeners:
+            callback(self)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        yield
+
+    async def cursor(self, query: str, *args: Any) -> AsyncIterator[FakeRecord]:
+        # asyncpg cursors fetch `prefetch` rows per round trip
+        rows = self.db.result
+        for start in range(0, len(rows), self.prefetch):
+            await self.db.wait()
+            end = start + self.prefetch
+            for values in rows[start:end]:
+                yield FakeRecord(values, self._index)
+
+    async def fetch(self, query: str, *args: Any) -> List[FakeRecord]:
+        await self.db.wait()
+        if query.startswith('EXPLAIN'):
+            return [FakeRecord(('Fake Scan',), {'QUERY PLAN': 0})]
+        return [FakeRecord(values, self._index) for values in self.db.result]
+
+    async def execute(self, query: str, *args: Any) -> str:
+        await self.db.wait()
+        return 'OK'
+
+    async def executemany(self, query: str, args: Sequence[Sequence]) -> None:
+        await self.db.wait()
+        self.db.written += len(args)
+
+    async def set_type_codec(self, typename: str, **kwargs: Any) -> None:
+        self.codecs[typename] = kwargs
+
+
+class FakeAsyncpgPool:
+    def __init__(self, db: FakeDatabase, max_size: int, init: Callable = None):
+        self.db = db
+        self.init = init
+        self._closed = False
+        self._connections: List[FakeAsyncpgConnection] = []
+        self._free: Optional[asyncio.Queue] = None
+        self._max_size = max_size
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[FakeAsyncpgConnection]:
+        if self._closed:
+            raise RuntimeError('pool is closed')
+        if self._free is None:
+            self._free = asyncio.Queue()
+        if self._free.empty() and len(self._connections) < self._max_size:
+            self._free.put_nowait(await self._connect())
+        conn = await self._free.get()
+        try:
+            yield conn
+        finally:
+            if conn.closed:
+                # replace a terminated connection, like asyncpg's pool does
+                self._connections.remove(conn)
+                conn = await self._connect()
+            self._free.put_nowait(conn)
+
+    async def _connect(self) -> FakeAsyncpgConnection:
+        conn = FakeAsyncpgConnection(self.db)
+        if self.init is not None:
+            await self.init(conn)
+        self._connections.append(conn)
+        return conn
+
+    async def close(self) -> None:
+        self._closed = True
+
+
+class FakeMySQLResult:
+    """The part of pymysql's MySQLResult the clients look at: whether an unbuffered result still
+    has rows waiting to be read"""
+
+    def __init__(self, unbuffered: bool):
+        self.unbuffered_active = unbuffered
+
+
+class FakeAiomysqlCursor:
+    def __init__(self, conn: 'FakeAiomysqlConnection', dicts: bool, unbuffered: bool = False):
+        self.conn = conn
+        self.dicts = dicts
+        self.unbuffered = unbuffered
+        self.description: Optional[List[Tuple]] = None
+        self.rowcount = -1
+        self._rows: Iterator[Tuple] = iter(())
+        self._result: Optional[FakeMySQLResult] = None
+
+    async def execute(self, query: str, params: Any = None) -> int:
+        db = self.conn.db
+        await db.wait()
+        if not db.is_read(query):
+            self.description = None
+            self.rowcount = 1
+            return 1
+        self.description = [(name, 253, None, None, None, None, True) for name in db.columns]
+        self._rows = iter(db.result)
+        self._result = FakeMySQLResult(self.unbuffered)
+        self.rowcount = len(db.result)
+        return self.rowcount
+
+    async def executemany(self, query: str, args: Sequence) -> int:
+        await self.conn.db.wait()
+        self.conn.db.written += len(args)
+        self.rowcount = len(args)
+        return self.rowcount
+
+    def _make_row(self, row: Tuple) -> Any:
+        return dict(zip(self.conn.db.columns, row)) if self.dicts else row
+
+    async def fetchall(self) -> List[Any]:
+        return [self._make_row(row) for row in self._rows]
+
+    def __aiter__(self) -> 'FakeAiomysqlCursor':
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return self._make_row(next(self._rows))
+        except StopIteration:
+            self._result = None
+            raise StopAsyncIteration
+
+    async def close(self) -> None:
+        # like pymysql, closing an unbuffered cursor reads (and throws away) the rest of the rows
+        self._rows = iter(())
+        self._result = None
+
+    async def __aenter__(self) -> 'FakeAiomysqlCursor':
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+
+class _CursorContext:
+    """Lets `conn.cursor()` be awaited or used with `async with`, like aiomysql's"""
+
+    def __init__(self, cursor: FakeAiomysqlCursor):
+        self.cursor = cursor
+
+    def __await__(self):
+        async def cursor() -> FakeAiomysqlCursor:
+            return self.cursor
+
+        return cursor().__await__()
+
+    async def __aenter__(self) -> FakeAiomysqlCursor:
+        return self.cursor
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.cursor.close()
+
+
+class FakeAiomysqlConnection:
+    _thread_ids = iter(range(1, 1 << 62))
+
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+        self.closed = False
+        self._thread_id = next(self._thread_ids)
+
+    def cursor(self, cursor_class: Any = None) -> _CursorContext:
+        # aiomysql's dict cursors all have Dict in their name and its unbuffered cursors start
+        # with SS, E.g. SSDictCursor
+        name = getattr(cursor_class, '__name__', '')
+        return _CursorContext(FakeAiomysqlCursor(self, 'Dict' in name, name.startswith('SS')))
+
+    async def commit(self) -> None:
+        await self.db.wait()
+
+    def thread_id(self) -> int:
+        return self._thread_id
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeAiomysqlPool:
+    def __init__(self, db: FakeDatabase, max_size: int):
+        self.db = db
+        self._closed = False
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._max_size = max_size
+        self._free: List[FakeAiomysqlConnection] = []
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[FakeAiomysqlConnection]:
+        if self._closed:
+            raise RuntimeError('pool is closed')
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_size)
+        async with self._semaphore:
+            conn = self._free.pop() if self._free else FakeAiomysqlConnection(self.db)
+            try:
+                yield conn
+            finally:
+                if not conn.closed:
+                    self._free.append(conn)
+
+    def close(self) -> None:
+        self._closed = True
+
+    async def wait_closed(self) -> None:
+        pass
+
+
+class FakeContext:
+    """The result of a statement, as pg8000's cursors expect it from their connection"""
+
+    def __init__(self, rows: Optional[List], columns: List[Dict[str, Any]], row_count: int):
+        self.rows = rows
+        self.columns = columns
+        self.row_count = row_count
+
+
+class FakePg8000Connection:
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+        self.autocommit = False
+        self.adapters: Dict[int, Callable] = {}
+        self._in_transaction = False
+        self._sock: Optional[object] = object()
+        self._columns = [{'name': name, 'type_oid': 25} for name in db.columns]
+        self._type_oids = dict(_TYPE_OIDS)
+
+    def execute_simple(self, statement: str) -> FakeContext:
+        return self.execute_unnamed(statement)
+
+    def execute_unnamed(
+        self, statement: str, vals: Sequence = (), oids: Sequence = (), stream: Any = None
+    ) -> FakeContext:
+        command = statement.strip().lower()
+        if command in ('begin transaction', 'commit'):
+            self._in_transaction = command == 'begin transaction'
+            return FakeContext(None, [], -1)
+        self.db.wait_blocking()
+        if 'pg_type' in statement:
+            return self._type_oid(vals[0])
+        if statement.startswith('EXPLAIN'):
+            return FakeContext([['Fake Scan']], [{'name': 'QUERY PLAN', 'type_oid': 25}], 1)
+        if self.db.is_read(statement):
+            return FakeContext(self.db.result, self._columns, len(self.db.result))
+        # multi-row inserts from Postgres.write(batch_size=...) join their rows with ', '
+        rows = statement.count('), (') + 1
+        self.db.written += rows
+        return FakeContext(None, [], rows)
+
+    def _type_oid(self, typename: str) -> FakeContext:
+        """The result of looking up a type's oid (see Postgres.type_oid). Every type has its own
+        oid, the real one for the types yessql has codecs for"""
+        oid = self._type_oids.setdefault(typename, 100_000 + len(self._type_oids))
+        return FakeContext([[oid]], [{'name': 'oid', 'type_oid': 26}], 1)
+
+    def commit(self) -> None:
+        self.execute_unnamed('commit')
+
+    def register_in_adapter(self, oid: int, decoder: Callable) -> None:
+        self.adapters[oid] = decoder
+
+    def close(self) -> None:
+        self._sock = None
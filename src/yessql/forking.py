@@ -0,0 +1,63 @@
+import os
+import weakref
+from typing import Any, List, Optional
+
+from yessql.logger import logger
+
+# Pools and connections that were open when the process forked. They share sockets with the parent,
+# so the child must never use or close them. We hold on to them so that they are never garbage
+# collected either, since finalizers could try to talk to the server over the shared socket.
+_inherited: List[Any] = []
+_clients: 'weakref.WeakSet[Any]' = weakref.WeakSet()
+
+
+def track(client: Any) -> None:
+    """Register a client so that it is reset in child processes after a fork. The client must have
+    an `after_fork` method."""
+    _clients.add(client)
+
+
+def inherit(resource: Any) -> None:
+    """Keep a pool or connection inherited from the parent process alive without ever using it"""
+    _inherited.append(resource)
+
+
+def _after_fork_in_child() -> None:
+    for client in list(_clients):
+        try:
+            client.after_fork()
+        except Exception:
+            logger.exception(f'Unable to reset {type(client).__name__} after fork')
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def per_process_pool_size(
+    budget: int, processes: Optional[int] = None, reserve: int = 0, min_size: int = 1
+) -> int:
+    """
+    Split a global connection budget between the processes of a pre-forking server so that the
+    pools of every worker together never go over the limit the database allows.
+    Args:
+        budget: The total # of connections every process together may open
+        processes: The # of processes sharing the budget. Defaults to the WEB_CONCURRENCY
+            environment variable (which gunicorn also reads), or the # of CPUs if that isn't set
+        reserve: Connections to hold back from the budget, E.g. for migrations or admin sessions
+        min_size: The smallest pool size to return, even when the budget is oversubscribed
+
+    Returns:
+        The max_size to use for each process' pool
+    """
+    if processes is None:
+        processes = int(os.environ.get('WEB_CONCURRENCY', 0)) or os.cpu_count() or 1
+    if processes < 1:
+        raise ValueError(f'processes must be at least 1, got {processes}')
+    size = (budget - reserve) // processes
+    if size < min_size:
+        logger.warning(
+            f'A budget of {budget} connections (reserving {reserve}) is too small for {processes} '
+            f'processes, using pools of {min_size} instead'
+        )
+    return max(min_size, size)
@@ -0,0 +1,157 @@
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+
+class Lane:
+    """A named lane for acquiring connections from a client's pool.
+
+    When a pool is busy, waiters are served in order of their lane's priority (lower numbers first)
+    and then in the order they arrived. A lane can also reserve connections that other lanes are
+    never given, so that E.g. interactive reads always have a connection available no matter how
+    many batch writes are running.
+
+    Attributes:
+        name: The name used to select the lane when calling a client method
+        priority: Waiters in lanes with a lower priority number are served first
+        reserved: The # of connections only this lane can use
+    """
+
+    def __init__(self, name: str, priority: int = 0, reserved: int = 0):
+        self.name = name
+        self.priority = priority
+        self.reserved = reserved
+
+    def __repr__(self) -> str:
+        return f'Lane(name={self.name!r}, priority={self.priority}, reserved={self.reserved})'
+
+
+class LaneStats:
+    """Acquire statistics for a single lane"""
+
+    def __init__(self):
+        self.acquired = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'acquired': self.acquired,
+            'in_use': self.in_use,
+            'waiting': self.waiting,
+            'total_wait': self.total_wait,
+            'mean_wait': self.mean_wait,
+            'max_wait': self.max_wait,
+        }
+
+
+class LaneScheduler:
+    """**Lane Scheduler**
+
+    Sits in front of a connection pool and decides which waiter gets the next connection. The
+    scheduler never hands out more than `capacity` connections, which should be the max_size of the
+    pool, so acquiring from the pool itself never has to wait.
+    """
+
+    def __init__(self, capacity: int, lanes: Sequence[Lane]):
+        """
+        Args:
+            capacity: The total # of connections in the pool
+            lanes: The lanes callers can use. The first lane is used when no lane is given
+        """
+        if not lanes:
+            raise ValueError('At least one lane is required')
+        if sum(lane.reserved for lane in lanes) > capacity:
+            raise ValueError(f'Lanes reserve more connections than the pool has ({capacity})')
+        self.capacity = capacity
+        self.lanes: Dict[str, Lane] = {lane.name: lane for lane in lanes}
+        self.default = lanes[0]
+        self.stats: Dict[str, LaneStats] = {lane.name: LaneStats() for lane in lanes}
+        self._waiters: List[Tuple[int, int, Lane, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    def lane(self, name: Optional[str]) -> Lane:
+        if name is None:
+            return self.default
+        try:
+            return self.lanes[name]
+        except KeyError:
+            raise ValueError(f'Unknown lane {name!r}, expected one of {list(self.lanes)}')
+
+    @property
+    def in_use(self) -> int:
+        return sum(stats.in_use for stats in self.stats.values())
+
+    def _available(self, lane: Lane) -> bool:
+        owed = sum(
+            max(0, other.reserved - self.stats[other.name].in_use)
+            for other in self.lanes.values()
+            if other is not lane
+        )
+        return self.capacity - self.in_use - owed > 0
+
+    def _dispatch(self) -> None:
+        for waiter in sorted(self._waiters, key=lambda w: w[:2]):
+            *_, lane, future = waiter
+            if future.done():
+                self._waiters.remove(waiter)
+            elif self._available(lane):
+                self._waiters.remove(waiter)
+                self.stats[lane.name].in_use += 1
+                future.set_result(None)
+
+    async def _acquire_slot(self, lane: Lane) -> None:
+        stats = self.stats[lane.name]
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((lane.priority, next(self._counter), lane, future))
+        start = perf_counter()
+        self._dispatch()
+        stats.waiting += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            # we may have been handed a slot in the same iteration we were cancelled
+            if future.done() and not future.cancelled():
+                self._release_slot(lane)
+            raise
+        finally:
+            stats.waiting -= 1
+        wait = perf_counter() - start
+        stats.acquired += 1
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+
+    def _release_slot(self, lane: Lane) -> None:
+        self.stats[lane.name].in_use -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def acquire(self, pool: Any, lane: str = None) -> AsyncIterator[Any]:
+        """
+        Wait for a slot in the given lane and then acquire a connection from pool.
+        Args:
+            pool: The connection pool, which must support `async with pool.acquire()`
+            lane: The name of the lane to acquire from or None for the default lane
+
+        Returns:
+            An async context manager that yields a connection
+        """
+        _lane = self.lane(lane)
+        await self._acquire_slot(_lane)
+        try:
+            async with pool.acquire() as conn:
+                yield conn
+        finally:
+            self._release_slot(_lane)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Return the acquire statistics for every lane"""
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
@@ -0,0 +1,122 @@
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+from yessql.rows import RowFactory, RowMaker
+
+OrderBy = Union[str, Sequence[str]]
+
+
+class Page(list):
+    """A single page of rows returned from `paginate`.
+
+    Behaves exactly like a list of rows but also carries a checkpoint token for the last row on the
+    page. Passing the token back to `paginate` resumes reading from the page after this one.
+    """
+
+    def __init__(self, rows: Sequence, token: str):
+        super().__init__(rows)
+        self.token = token
+
+
+def order_columns(order_by: OrderBy) -> List[str]:
+    return [order_by] if isinstance(order_by, str) else list(order_by)
+
+
+def keyset_query(
+    query: str, columns: Sequence[str], page_size: int, placeholders: Optional[Sequence[str]]
+) -> str:
+    """Wrap a query so that it returns a single page, seeking past the last key we have seen.
+
+    Args:
+        query: The query to paginate
+        columns: The columns (from the output of query) that make up a unique ordering key
+        page_size: The maximum # of rows in a page
+        placeholders: The bind parameter placeholders for the last key or None for the first page
+
+    Returns:
+        The query for the next page
+    """
+    key = ', '.join(columns)
+    where = f'WHERE ({key}) > ({", ".join(placeholders)}) ' if placeholders else ''
+    return f'SELECT * FROM ({query}) AS _yessql_page {where}ORDER BY {key} LIMIT {int(page_size)}'
+
+
+def page_key(row: Any, columns: Sequence[str], keys: Sequence[str] = ()) -> Tuple:
+    """Return the ordering key for a row. Tuple and list rows (E.g. from yessql.rows.tuple_row or
+    a driver's plain cursor) are looked up by position in keys, the column names of the result set.
+    Any other row must allow access by column name, either by index (dicts, asyncpg Records) or by
+    attribute (pydantic models)"""
+    if isinstance(row, (tuple, list)):
+        return tuple(row[_position(keys, column)] for column in columns)
+    return tuple(_column(row, column) for column in columns)
+
+
+def recording_factory(factory: RowFactory, keys: List[str]) -> RowFactory:
+    """Wrap a row factory so that the column names it is built with are copied into keys, which
+    lets `page_key` find the ordering key in rows that can only be indexed by position"""
+
+    def record_keys(names: Sequence[str]) -> RowMaker:
+        keys[:] = names
+        return factory(names)
+
+    return record_keys
+
+
+def _position(keys: Sequence[str], column: str) -> int:
+    try:
+        return list(keys).index(column)
+    except ValueError:
+        raise ValueError(f'Unable to paginate on {column}, it is not a column in the results')
+
+
+def _column(row: Any, column: str) -> Any:
+    try:
+        return row[column]
+    except (TypeError, KeyError):
+        return getattr(row, column)
+
+
+def encode_token(key: Sequence) -> str:
+    """Encode a key into an opaque, url safe checkpoint token"""
+    data = json.dumps(list(key), default=_encode_value, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_token(token: str) -> Tuple:
+    """Decode a checkpoint token created by `encode_token` back into a key"""
+    data = base64.urlsafe_b64decode(token.encode())
+    return tuple(json.loads(data, object_hook=_decode_value))
+
+
+_ENCODERS: Tuple[Tuple[type, str, Callable[[Any], str]], ...] = (
+    (datetime, 'datetime', datetime.isoformat),
+    (date, 'date', date.isoformat),
+    (time, 'time', time.isoformat),
+    (UUID, 'uuid', str),
+    (Decimal, 'decimal', str),
+)
+
+_DECODERS = {
+    'datetime': datetime.fromisoformat,
+    'date': date.fromisoformat,
+    'time': time.fromisoformat,
+    'uuid': UUID,
+    'decimal': Decimal,
+}
+
+
+def _encode_value(value: Any) -> Dict[str, str]:
+    for typ, name, encode in _ENCODERS:
+        if isinstance(value, typ):
+            return {'$type': name, 'value': encode(value)}
+    raise TypeError(f'Unable to use {type(value).__name__} values in a pagination token')
+
+
+def _decode_value(value: Dict) -> Any:
+    if '$type' in value:
+        return _DECODERS[value['$type']](value['value'])
+    return value
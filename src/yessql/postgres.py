@@ -1,8 +1,26 @@
-from typing import Dict, Generator, List, Tuple, Union
+from time import perf_counter
+from typing import Generator, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import pg8000.dbapi as postgresql
 
+from yessql.batching import batches, split_values
+from yessql.codecs import PostgresCodec
 from yessql.config import PostgresConfig
+from yessql.forking import inherit, track
+from yessql.logger import logger
+from yessql.pagination import (
+    OrderBy,
+    Page,
+    decode_token,
+    encode_token,
+    keyset_query,
+    order_columns,
+    page_key,
+    recording_factory,
+)
+from yessql.prefetch import prefetch_rows_threaded
+from yessql.profiler import QueryProfiler, counted, timed
+from yessql.rows import RowFactory, dict_row
 from yessql.utils import PendingConnection, PendingConnectionError
 
 
@@ -34,13 +52,56 @@ class Postgres:
     Postgres client see yessql.AioPostgres
     """
 
-    def __init__(self, config: PostgresConfig):
+    def __init__(
+        self,
+        config: PostgresConfig,
+        row_factory: RowFactory = dict_row,
+        profiler: QueryProfiler = None,
+        codecs: Sequence[PostgresCodec] = None,
+    ):
         """
         Args:
             config: A PostgresConfig object for connecting to the database
+            row_factory: Controls the type of rows returned by `read`. Defaults to dicts, see
+                yessql.rows for cheaper alternatives (tuples, records or the raw driver rows)
+            profiler: An optional QueryProfiler used to record timings for every query
+            codecs: Optional custom type decoders registered on the connection, E.g.
+                yessql.codecs.postgres_json_codecs() to decode json/jsonb with the fastest library
         """
         self.config = config
-        self.connection: Union[postgresql.Connection, PendingConnection] = PendingConnection()
+        self.row_factory = row_factory
+        self.profiler = profiler
+        self.codecs = list(codecs or ())
+        self.reconnect = False
+        self._connection: Union[postgresql.Connection, PendingConnection] = PendingConnection()
+        track(self)
+
+    @property
+    def connection(self) -> Union[postgresql.Connection, PendingConnection]:
+        if self.reconnect:
+            self.reconnect = False
+            try:
+                self.setup_connection()
+            except BaseException:
+                self.reconnect = True
+                raise
+        return self._connection
+
+    @connection.setter
+    def connection(self, connection: Union[postgresql.Connection, PendingConnection]) -> None:
+        self._connection = connection
+
+    def after_fork(self) -> None:
+        """Called in the child process after a fork.
+
+        The connection was made by the parent and shares its socket, so using it from both processes
+        would interleave their messages. The child leaves it alone and connects again on first use.
+        """
+        if isinstance(self._connection, PendingConnection):
+            return
+        inherit(self._connection)
+        self._connection = PendingConnection()
+        self.reconnect = True
 
     def setup_connection(self) -> None:
         """
@@ -57,6 +118,22 @@ class Postgres:
             password=self.config.password.get_secret_value(),
             database=self.config.database,
         )
+        for codec in self.codecs:
+            self.connection.register_in_adapter(self.type_oid(codec), codec.decoder)
+
+    def type_oid(self, codec: PostgresCodec) -> int:
+        """Look up the oid of the type a codec is for"""
+        with ContextCursor(self.connection) as cursor:
+            cursor.execute(
+                'SELECT t.oid FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace '
+                'WHERE t.typname = %s AND n.nspname = %s',
+                (codec.typename, codec.schema),
+            )
+            row = cursor.fetchone()
+            self.connection.commit()
+        if row is None:
+            raise ValueError(f'Unknown type {codec.schema}.{codec.typename}')
+        return row[0]
 
     def close_connection(self) -> None:
         """
@@ -66,7 +143,8 @@ class Postgres:
         Returns:
             None
         """
-        self.connection.close()
+        self.reconnect = False
+        self._connection.close()
 
     def __enter__(self):
         self.setup_connection()
@@ -75,22 +153,66 @@ class Postgres:
     def __exit__(self, *args):
         self.close_connection()
 
-    def write(self, stmt: str, rows: List[Tuple]) -> int:
+    def write(
+        self, stmt: str, rows: Iterable[Tuple], batch_size: int = None, commit_every: int = 1
+    ) -> int:
         """
         Write some data to the database by passing an insert statement and a list of tuples for the
         rows
+
+        By default every row is sent with its own round trip to the database. Setting batch_size
+        rewrites an `INSERT ... VALUES (%s, ...)` statement into multi-row VALUES statements of up
+        to batch_size rows each (fewer if needed to stay under the Postgres bind parameter limit),
+        which is much faster for large writes.
         Args:
             stmt: The insert statement to run. `%s` placeholders are used for indicating params
-            rows: A list of tuples containing the data to pass to the above query.
+            rows: A list (or any iterable) of tuples containing the data to pass to the above
+                query. Batches are built as the rows are iterated over, so a generator is never
+                loaded into memory all at once
+            batch_size: The # of rows to insert per statement. None sends one row at a time
+            commit_every: When batching, commit after this many statements rather than only at the
+                end. Batches that have been committed stay written if a later batch fails
 
         Returns:
             Row count as an integer
 
         """
+        if (batch_size is not None and batch_size < 1) or commit_every < 1:
+            raise ValueError(
+                f'batch_size and commit_every must be at least 1, got {batch_size}, {commit_every}'
+            )
+        rows = counted(self.profiler, rows)
+        if batch_size is None:
+            with ContextCursor(connection=self.connection) as cursor:
+                with timed(self.profiler, stmt, rows):
+                    cursor.executemany(stmt, rows)
+                    self.connection.commit()
+                return cursor.rowcount
+        return self._write_batched(stmt, rows, batch_size, commit_every)
+
+    def _write_batched(
+        self, stmt: str, rows: Iterable[Tuple], batch_size: int, commit_every: int
+    ) -> int:
+        values = split_values(stmt)
+        size = values.rows_per_statement(batch_size)
+        full = values.for_rows(size)
+        written = 0
+        start = perf_counter()
         with ContextCursor(connection=self.connection) as cursor:
-            cursor.executemany(stmt, rows)
-            self.connection.commit()
-            return cursor.rowcount
+            with timed(self.profiler, stmt, rows):
+                for i, batch in enumerate(batches(rows, size), start=1):
+                    query = full if len(batch) == size else values.for_rows(len(batch))
+                    cursor.execute(query, [value for row in batch for value in row])
+                    written += max(cursor.rowcount, 0)
+                    if i % commit_every == 0:
+                        self.connection.commit()
+                self.connection.commit()
+        elapsed = perf_counter() - start
+        logger.info(
+            f'Wrote {written:,} rows in {elapsed:.3f}s '
+            f'({written / elapsed if elapsed else 0:,.0f} rows/sec)'
+        )
+        return written
 
     def commit(self, stmt: str) -> int:
         """
@@ -106,43 +228,128 @@ class Postgres:
 
         """
         with ContextCursor(connection=self.connection) as cursor:
-            cursor.execute(stmt)
-            self.connection.commit()
+            with timed(self.profiler, stmt):
+                cursor.execute(stmt)
+                self.connection.commit()
             return cursor.rowcount
 
-    def read(self, query: str, params: Tuple = None) -> Generator:
+    def read(
+        self, query: str, params: Tuple = None, prefetch: int = 0, batch_size: int = 100
+    ) -> Generator:
         """
         Read data from the database using the given query and params. This is a generator meaning
         you can iterate through the rows without loading them all into memory.
         Args:
             query: The query to run
             params: Any params to be substituted for `%s` strings in above query
+            prefetch: Build up to this many batches of rows ahead in a background thread while you
+                process the current rows. 0 disables this
+            batch_size: The # of rows per prefetched batch
 
         Returns:
             A generator
 
         """
+        rows = self._read(query, params)
+        if prefetch > 0:
+            rows = prefetch_rows_threaded(rows, prefetch, batch_size)
+        if self.profiler is None:
+            return rows
+        return self._capture_plan_after(rows, query, params)
+
+    def _read(
+        self, query: str, params: Optional[Tuple], row_factory: RowFactory = None
+    ) -> Generator:
         with ContextCursor(self.connection) as cursor:
+            started = perf_counter()
             if params is not None:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
 
-            keys = [k[0] for k in cursor.description]
-            for row in cursor:
-                yield dict(zip(keys, row))
+            make_row = (row_factory or self.row_factory)([k[0] for k in cursor.description])
+            if self.profiler is None:
+                for row in cursor:
+                    yield make_row(row)
+            else:
+                yield from self.profiler.profile_rows(query, cursor, make_row, started)
+
+    def _capture_plan_after(self, rows: Iterator, query: str, params: Optional[Tuple]) -> Generator:
+        yield from rows
+        self.capture_plan(query, params)
 
-    def read_all(self, query: str, params: Tuple = None) -> List[Dict]:
+    def capture_plan(self, query: str, params: Optional[Tuple]) -> None:
+        """
+        Capture the EXPLAIN output for query if the profiler has flagged it as slow. Called once a
+        read has finished (and its cursor is closed) rather than from the read itself
+        """
+        if self.profiler is not None and self.profiler.needs_plan(query):
+            self.profiler.add_plan(query, self.explain(query, params))
+
+    def explain(self, query: str, params: Tuple = None) -> str:
+        """
+        Run EXPLAIN (ANALYZE, BUFFERS) for a query and return the plan. Be aware this executes the
+        query.
+        Args:
+            query: The query to explain
+            params: Any params to be substituted for `%s` strings in above query
+
+        Returns:
+            The query plan as text
+        """
+        with ContextCursor(self.connection) as cursor:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {query}', params or ())
+            return '\n'.join(row[0] for row in cursor)
+
+    def read_all(self, query: str, params: Tuple = None) -> List:
         """
         If you want to return all rows from the query without worrying about memory management
-        then this method is useful. It will return a list of dictionaries containing the results
-        of the query
+        then this method is useful. It will return a list containing the results of the query
         Args:
             query: The query to run
             params: Any params to be substituted for `%s` strings in above query
 
         Returns:
-            A list of dicts with the data from the query
+            A list of rows (dicts unless another row_factory is used) with the data from the query
 
         """
         return [row for row in self.read(query, params)]
+
+    def paginate(
+        self,
+        query: str,
+        order_by: OrderBy,
+        page_size: int = 1000,
+        params: Tuple = None,
+        token: str = None,
+    ) -> Generator[Page, None, None]:
+        """
+        Read through a large result set one page at a time using keyset (seek) pagination. Unlike
+        LIMIT/OFFSET every page costs the same to read no matter how deep into the results you are
+        and no cursor or transaction is held open between pages.
+        Args:
+            query: The query to run. It is wrapped in a subquery so shouldn't have its own ORDER BY
+            order_by: Column name(s) from the query output that uniquely order the rows
+            page_size: The maximum # of rows in each page
+            params: Any params to be substituted for `%s` strings in above query
+            token: A checkpoint token from a previous Page to resume reading after
+
+        Returns:
+            A generator of Pages. Each Page is a list of rows with a `token` attribute
+        """
+        columns = order_columns(order_by)
+        after = decode_token(token) if token is not None else None
+        keys: List[str] = []
+        row_factory = recording_factory(self.row_factory, keys)
+        while True:
+            placeholders = ['%s'] * len(columns) if after is not None else None
+            page_params = tuple(params or ()) + tuple(after or ())
+            page_query = keyset_query(query, columns, page_size, placeholders)
+            rows = list(self._read(page_query, page_params or None, row_factory))
+            self.capture_plan(page_query, page_params or None)
+            if not rows:
+                return
+            after = page_key(rows[-1], columns, keys)
+            yield Page(rows, encode_token(after))
+            if len(rows) < page_size:
+                return
@@ -0,0 +1,136 @@
+import asyncio
+import queue
+import threading
+from typing import Any, AsyncGenerator, Generator, Iterator, List
+
+from yessql import batching
+from yessql.streams import aclosing
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def prefetch_rows(rows: AsyncGenerator, batches: int, batch_size: int) -> AsyncGenerator:
+    """
+    Read rows in a background task while the consumer works on the rows already fetched, so the time
+    spent waiting on the database overlaps with the time spent processing rows.
+
+    Up to `batches` batches of `batch_size` rows are buffered in a bounded queue. Closing the
+    generator (or cancelling the consumer) cancels the background task, which releases the
+    connection it holds.
+
+    Args:
+        rows: The async generator of rows to read ahead of the consumer
+        batches: The maximum # of batches to buffer
+        batch_size: The # of rows per batch
+
+    Returns:
+        An AsyncGenerator yielding the same rows as `rows`
+    """
+    buffer: asyncio.Queue = asyncio.Queue(maxsize=batches)
+    task = asyncio.get_running_loop().create_task(_produce(rows, buffer, batch_size))
+    try:
+        batch = await buffer.get()
+        while batch is not _DONE:
+            for row in _unwrap(batch):
+                yield row
+            batch = await buffer.get()
+    finally:
+        task.cancel()
+        await asyncio.wait([task])
+
+
+async def _produce(rows: AsyncGenerator, buffer: asyncio.Queue, batch_size: int) -> None:
+    try:
+        async with aclosing(_abatches(rows, batch_size)) as batched:
+            async for batch in batched:
+                await buffer.put(batch)
+        await buffer.put(_DONE)
+    except Exception as err:
+        await buffer.put(_Failed(err))
+
+
+async def _abatches(rows: AsyncGenerator, batch_size: int) -> AsyncGenerator[List[Any], None]:
+    """The async equivalent of yessql.batching.batches, which closes rows when it is closed"""
+    async with aclosing(rows):
+        batch: List[Any] = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _unwrap(batch: Any) -> List[Any]:
+    """Return a batch taken off the buffer, raising the error instead if the producer failed"""
+    if isinstance(batch, _Failed):
+        raise batch.error
+    return batch
+
+
+def prefetch_rows_threaded(rows: Iterator, batches: int, batch_size: int) -> Generator:
+    """
+    The threaded equivalent of `prefetch_rows` for blocking clients. Rows are read in a background
+    thread while the consumer works on the rows already fetched.
+
+    The connection behind `rows` must not be used by anything else until this generator is exhausted
+    or closed.
+
+    Args:
+        rows: The iterator of rows to read ahead of the consumer
+        batches: The maximum # of batches to buffer
+        batch_size: The # of rows per batch
+
+    Returns:
+        A Generator yielding the same rows as `rows`
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=batches)
+    stopped = threading.Event()
+    thread = threading.Thread(
+        target=_produce_threaded,
+        args=(rows, buffer, stopped, batch_size),
+        name='yessql-prefetch',
+        daemon=True,
+    )
+    thread.start()
+    try:
+        batch = buffer.get()
+        while batch is not _DONE:
+            yield from _unwrap(batch)
+            batch = buffer.get()
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def _produce_threaded(
+    rows: Iterator, buffer: queue.Queue, stopped: threading.Event, batch_size: int
+) -> None:
+    try:
+        for batch in batching.batches(rows, batch_size):
+            if not _put(buffer, stopped, batch):
+                return
+        _put(buffer, stopped, _DONE)
+    except Exception as err:
+        _put(buffer, stopped, _Failed(err))
+    finally:
+        close = getattr(rows, 'close', None)
+        if close is not None:
+            close()
+
+
+def _put(buffer: queue.Queue, stopped: threading.Event, item: Any) -> bool:
+    """Put item on the buffer, giving up (and returning False) once the consumer has stopped"""
+    while not stopped.is_set():
+        try:
+            buffer.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
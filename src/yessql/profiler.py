@@ -0,0 +1,251 @@
+import json
+import math
+import re
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterable,
+    ContextManager,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sized,
+    TextIO,
+    Union,
+)
+
+from yessql.logger import logger
+from yessql.rows import RowMaker
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'(?<![$\w])-?\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(query: str) -> str:
+    """Reduce a query to its shape so that the same statement with different literals is counted as
+    a single query. String and number literals are replaced with `?` and whitespace is collapsed."""
+    query = _STRINGS.sub('?', query)
+    query = _NUMBERS.sub('?', query)
+    return _WHITESPACE.sub(' ', query).strip()
+
+
+class QueryStats:
+    """Aggregated timings for every call of a single (normalized) query.
+
+    Attributes:
+        query: The normalized query text
+        count: The # of times the query was run
+        total: Total seconds spent running the query
+        database: Seconds spent waiting on the database, including fetching rows
+        python: Seconds spent in Python turning driver rows into the rows we return
+        rows: Total # of rows returned (or written)
+        plan: The EXPLAIN output captured for the query if it was slow and explain is enabled
+    """
+
+    def __init__(self, query: str, samples: int):
+        self.query = query
+        self.count = 0
+        self.total = 0.0
+        self.database = 0.0
+        self.python = 0.0
+        self.rows = 0
+        self.plan: Optional[str] = None
+        self.last_slow = False
+        self.samples: Deque[float] = deque(maxlen=samples)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def p95(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[math.ceil(0.95 * len(ordered)) - 1]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'query': self.query,
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'p95': self.p95,
+            'database': self.database,
+            'python': self.python,
+            'rows': self.rows,
+            'plan': self.plan,
+        }
+
+
+class QueryProfiler:
+    """**Query Profiler**
+
+    An opt-in profiler that can be passed to any of the clients to find out which queries are hot.
+    Timings are aggregated per normalized query and any query slower than `slow_threshold` is logged
+    through yessql.logger. With `explain` enabled we also capture the `EXPLAIN` plan of slow reads.
+    """
+
+    def __init__(self, slow_threshold: float = None, explain: bool = False, samples: int = 1000):
+        """
+        Args:
+            slow_threshold: Queries taking longer than this many seconds are logged as slow
+            explain: Capture `EXPLAIN ANALYZE` output for slow reads. The read is run a second time
+                to do this so only enable it when you are investigating
+            samples: The # of most recent timings kept per query for calculating the p95
+        """
+        self.slow_threshold = slow_threshold
+        self.explain = explain
+        self.samples = samples
+        self.stats: Dict[str, QueryStats] = {}
+
+    def record(self, query: str, database: float, python: float = 0.0, rows: int = 0) -> bool:
+        """
+        Record a single call of a query.
+        Args:
+            query: The query that was run
+            database: Seconds spent waiting on the database
+            python: Seconds spent materializing rows in Python
+            rows: The # of rows returned or written
+
+        Returns:
+            True if the call was slower than the slow_threshold
+        """
+        key = normalize_query(query)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = QueryStats(key, self.samples)
+        elapsed = database + python
+        stats.count += 1
+        stats.total += elapsed
+        stats.database += database
+        stats.python += python
+        stats.rows += rows
+        stats.samples.append(elapsed)
+        stats.last_slow = self.slow_threshold is not None and elapsed > self.slow_threshold
+        if stats.last_slow:
+            logger.warning(f'Slow query took {elapsed:.3f}s ({rows} rows): {key}')
+        return stats.last_slow
+
+    @contextmanager
+    def timed(self, query: str, rows: 'Rows' = 0) -> Generator[None, None, None]:
+        """Record the time spent inside the with block as database time for query. rows is the #
+        of rows written, or the rows themselves (see `counted`), which are counted on the way out"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(query, perf_counter() - start, rows=_count(rows))
+
+    def profile_rows(
+        self, query: str, rows: Iterable, make_row: RowMaker, started: float
+    ) -> Generator:
+        """Materialize rows from a cursor, recording time spent fetching vs. building rows. Time
+        the consumer spends between rows is not counted."""
+        database = python = 0.0
+        count = 0
+        mark = started
+        try:
+            for raw in rows:
+                fetched = perf_counter()
+                database += fetched - mark
+                row = make_row(raw)
+                mark = perf_counter()
+                python += mark - fetched
+                count += 1
+                yield row
+                mark = perf_counter()
+            database += perf_counter() - mark
+        finally:
+            self.record(query, database, python, count)
+
+    async def aprofile_rows(
+        self, query: str, rows: AsyncIterable, make_row: RowMaker, started: float
+    ) -> AsyncGenerator:
+        """Async version of `profile_rows`"""
+        database = python = 0.0
+        count = 0
+        mark = started
+        try:
+            async for raw in rows:
+                fetched = perf_counter()
+                database += fetched - mark
+                row = make_row(raw)
+                mark = perf_counter()
+                python += mark - fetched
+                count += 1
+                yield row
+                mark = perf_counter()
+            database += perf_counter() - mark
+        finally:
+            self.record(query, database, python, count)
+
+    def needs_plan(self, query: str) -> bool:
+        """Whether the last call of query was slow and we still need to capture its plan"""
+        stats = self.stats.get(normalize_query(query))
+        return self.explain and stats is not None and stats.last_slow and stats.plan is None
+
+    def add_plan(self, query: str, plan: str) -> None:
+        self.stats[normalize_query(query)].plan = plan
+
+    def report(self) -> List[Dict[str, Any]]:
+        """
+        Return the stats for every query, sorted by the total time spent running it.
+
+        Returns:
+            A list of dicts, one per normalized query
+        """
+        ordered = sorted(self.stats.values(), key=lambda stats: stats.total, reverse=True)
+        return [stats.as_dict() for stats in ordered]
+
+    def dump(self, fp: TextIO) -> None:
+        """Write the report as JSON to a file like object"""
+        json.dump(self.report(), fp, indent=2)
+
+    def reset(self) -> None:
+        self.stats = {}
+
+
+class RowCounter:
+    """Counts the rows of a write as the driver iterates over them"""
+
+    def __init__(self, rows: Iterable):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self) -> Iterator:
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+Rows = Union[int, Sized, RowCounter]
+
+
+def counted(profiler: Optional[QueryProfiler], rows: Iterable) -> Iterable:
+    """Return the rows for a write, wrapped in a RowCounter if profiling is enabled and they can't
+    be counted with len(), E.g. generators. Without a profiler the rows are returned untouched"""
+    if profiler is None or isinstance(rows, Sized):
+        return rows
+    return RowCounter(rows)
+
+
+def timed(profiler: Optional[QueryProfiler], query: str, rows: Rows = 0) -> ContextManager:
+    """Time a statement with profiler, or do nothing if profiling isn't enabled"""
+    return profiler.timed(query, rows) if profiler is not None else nullcontext()
+
+
+def _count(rows: Rows) -> int:
+    if isinstance(rows, int):
+        return rows
+    if isinstance(rows, RowCounter):
+        return rows.count
+    return len(rows)
@@ -0,0 +1,95 @@
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+RowMaker = Callable[[Sequence], Any]
+RowFactory = Callable[[Sequence[str]], RowMaker]
+
+
+def dict_row(keys: Sequence[str]) -> RowMaker:
+    """Build a dictionary for every row.
+
+    This is the most convenient representation but also the most expensive since every row pays for
+    its own hash table on top of the values it holds.
+
+    Args:
+        keys: The column names from the cursor description
+
+    Returns:
+        A callable that turns a row into a dict
+    """
+
+    def make_row(row: Sequence) -> Dict[str, Any]:
+        return dict(zip(keys, row))
+
+    return make_row
+
+
+def tuple_row(keys: Sequence[str]) -> RowMaker:
+    """Return every row as a plain tuple, ordered the same as the columns in the query.
+
+    Args:
+        keys: The column names from the cursor description
+
+    Returns:
+        A callable that turns a row into a tuple
+    """
+    return tuple
+
+
+def raw_row(keys: Sequence[str]) -> RowMaker:
+    """Return rows exactly as the driver hands them to us (lists for pg8000, Records for asyncpg).
+
+    Args:
+        keys: The column names from the cursor description
+
+    Returns:
+        A callable that returns the row untouched
+    """
+    return _identity
+
+
+def record_row(keys: Sequence[str]) -> RowMaker:
+    """Return every row as a namedtuple.
+
+    The namedtuple class is generated once per cursor description and shared by every row, so rows
+    cost the same as a tuple while still allowing access by column name (E.g. `row.id`).
+
+    Args:
+        keys: The column names from the cursor description
+
+    Returns:
+        A callable that turns a row into a namedtuple
+    """
+    return _record_class(tuple(keys))._make
+
+
+def keyed_row(factory: RowFactory) -> RowMaker:
+    """Defer building the row maker from factory until the first row arrives, taking the column
+    names from the row itself. Useful for drivers (E.g. asyncpg) that don't give us a description
+    of the result set before we start iterating over it.
+
+    Args:
+        factory: The row factory to build the row maker with
+
+    Returns:
+        A callable that turns a row with a `keys` method into whatever factory produces
+    """
+    make_row: Optional[RowMaker] = None
+
+    def make_keyed_row(row: Any) -> Any:
+        nonlocal make_row
+        if make_row is None:
+            make_row = factory(list(row.keys()))
+        return make_row(row)
+
+    return make_keyed_row
+
+
+@lru_cache(maxsize=128)
+def _record_class(keys: Tuple[str, ...]) -> Any:
+    return namedtuple('Record', keys, rename=True)  # type: ignore
+
+
+def _identity(row: Sequence) -> Sequence:
+    return row
@@ -0,0 +1,72 @@
+import warnings
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator
+
+from yessql.logger import logger
+
+
+class ReadStream:
+    """**Read Stream**
+
+    The rows returned from an async client's `read`. You can iterate over it directly, although if
+    you might stop before reaching the end of the results (E.g. with `break`) you should use it as
+    an async context manager. This guarantees the connection behind the stream is returned to the
+    pool as soon as you leave the block, rather than whenever the stream is garbage collected.
+
+        async with pg.read('SELECT * FROM table') as rows:
+            async for row in rows:
+                ...
+
+    A stream that has started reading but is garbage collected without being closed holds on to a
+    pool connection until then, so we warn (and log) when that happens.
+    """
+
+    def __init__(self, rows: AsyncGenerator):
+        self._rows = rows
+        self._started = False
+        self.closed = False
+
+    def __aiter__(self) -> 'ReadStream':
+        return self
+
+    async def __anext__(self) -> Any:
+        self._started = True
+        try:
+            return await self._rows.__anext__()
+        except BaseException:
+            # any exception (including StopAsyncIteration) means the generator has finished and
+            # already released its connection
+            self.closed = True
+            raise
+
+    async def aclose(self) -> None:
+        """Stop reading and release the connection back to the pool"""
+        if not self.closed:
+            self.closed = True
+            await self._rows.aclose()
+
+    async def __aenter__(self) -> 'ReadStream':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+    def __del__(self):
+        if self._started and not self.closed:
+            message = (
+                'A ReadStream was garbage collected before it was closed, which keeps a database '
+                'connection checked out until now. Use `async with client.read(...)` to release it '
+                'as soon as you stop reading.'
+            )
+            warnings.warn(message, ResourceWarning, source=self)
+            logger.warning(message)
+
+
+@asynccontextmanager
+async def aclosing(rows: AsyncGenerator) -> AsyncIterator[AsyncGenerator]:
+    """Close an async generator when leaving the block, the same as `contextlib.aclosing` (which is
+    only available from Python 3.10)"""
+    try:
+        yield rows
+    finally:
+        await rows.aclose()
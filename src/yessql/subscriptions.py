@@ -0,0 +1,219 @@
+import asyncio
+from contextlib import AsyncExitStack
+from typing import Any, List, Optional, Type
+
+from pydantic import BaseModel
+
+from yessql.codecs import json_loads
+from yessql.forking import inherit
+from yessql.logger import logger
+
+# put on the queue when the listening connection is lost
+_TERMINATED = object()
+# put on the queue when the subscription is closed, to wake anything waiting on it
+_CLOSED = object()
+
+
+class Subscription:
+    """**Subscription**
+
+    The notifications sent to a Postgres channel with NOTIFY, returned from `AioPostgres.subscribe`.
+    A connection is checked out of the pool and kept for as long as the subscription is open, so use
+    it as an async context manager to make sure it is given back:
+
+        async with pg.subscribe('guitars', model=Guitar) as guitars:
+            async for guitar in guitars:
+                ...
+
+    If the connection is lost we check out another one and LISTEN again, retrying with a backoff of
+    up to `max_reconnect_delay` seconds. Anything notified while we weren't listening is missed, so
+    treat a reconnect (see `reconnects`) as a signal to refresh anything derived from the events.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        channel: str,
+        model: Type[BaseModel] = None,
+        batch_size: int = 1,
+        batch_window: float = 0.0,
+        lane: str = None,
+        reconnect_delay: float = 0.1,
+        max_reconnect_delay: float = 30.0,
+    ):
+        """
+        Args:
+            client: The AioPostgres client whose pool the listening connection comes from
+            channel: The channel to LISTEN on
+            model: An optional pydantic.BaseModel each payload is decoded into from JSON. Without a
+                model payloads are yielded as the strings they were sent as
+            batch_size: Yield lists of up to this many notifications rather than one at a time
+            batch_window: When batching, the # of seconds to wait for more notifications after the
+                first one before yielding a batch that isn't full
+            lane: The name of the lane to acquire the connection from, if lanes are configured
+            reconnect_delay: Seconds to wait before the first attempt to reconnect
+            max_reconnect_delay: The longest to wait between attempts to reconnect
+        """
+        self.client = client
+        self.channel = channel
+        self.model = model
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.lane = lane
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnects = 0
+        self.closed = False
+        self._queue: Optional[asyncio.Queue] = None
+        self._stack: Optional[AsyncExitStack] = None
+
+    @property
+    def batched(self) -> bool:
+        return self.batch_size > 1
+
+    def _notify(self, conn: Any, pid: int, channel: str, payload: str) -> None:
+        self._queue.put_nowait(payload)  # type: ignore
+
+    def _terminated(self, conn: Any) -> None:
+        self._queue.put_nowait(_TERMINATED)  # type: ignore
+
+    async def _listen(self) -> None:
+        stack = AsyncExitStack()
+        try:
+            conn = await stack.enter_async_context(self.client.acquire(self.lane))
+            await conn.add_listener(self.channel, self._notify)
+            conn.add_termination_listener(self._terminated)
+            stack.push_async_callback(self._unlisten, conn)
+        except BaseException:
+            await stack.aclose()
+            raise
+        self._stack = stack
+
+    async def _unlisten(self, conn: Any) -> None:
+        if not conn.is_closed():
+            conn.remove_termination_listener(self._terminated)
+            await conn.remove_listener(self.channel, self._notify)
+
+    async def _release(self) -> None:
+        if self._stack is not None:
+            stack, self._stack = self._stack, None
+            try:
+                await stack.aclose()
+            except Exception:
+                # the connection is usually already gone when we release it to reconnect
+                logger.debug(f'Error releasing the connection listening on {self.channel}')
+
+    async def _reconnect(self) -> None:
+        await self._release()
+        delay = self.reconnect_delay
+        while not self.closed:
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+            except Exception as err:
+                logger.warning(f'Unable to LISTEN on {self.channel} again, retrying: {err}')
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            if self.closed:
+                # closed while we were reconnecting, so give the new connection straight back
+                await self._release()
+                return
+            self.reconnects += 1
+            logger.warning(f'Reconnected to LISTEN on {self.channel}, notifications may be missed')
+            return
+
+    async def start(self) -> None:
+        """Check out a connection and start listening. Called automatically on first use"""
+        if self.closed:
+            raise ValueError('Unable to use a closed Subscription')
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            try:
+                await self._listen()
+            except BaseException:
+                self._queue = None
+                raise
+
+    def _decode(self, payload: str) -> Any:
+        if self.model is None:
+            return payload
+        return self.model(**json_loads(payload))
+
+    async def _next(self, timeout: float = None) -> Any:
+        """Wait for the next notification, reconnecting if the connection is lost, and decode it"""
+        while True:
+            payload = await self._get(timeout)
+            if payload is _TERMINATED:
+                await self._reconnect()
+                continue
+            try:
+                return self._decode(payload)
+            except (ValueError, TypeError) as err:
+                # pydantic's ValidationError is a ValueError. One bad payload shouldn't end the
+                # subscription, so log it and carry on with the next one
+                logger.error(f'Unable to decode a notification on {self.channel}: {err}')
+
+    async def _get(self, timeout: Optional[float]) -> Any:
+        """Take the next item off the queue, raising StopAsyncIteration once we have been closed"""
+        queue: asyncio.Queue = self._queue  # type: ignore
+        if not queue.empty():
+            payload = queue.get_nowait()
+        elif timeout is None:
+            payload = await queue.get()
+        else:
+            payload = await asyncio.wait_for(queue.get(), timeout)
+        if payload is _CLOSED:
+            # put it back so that anything else waiting on the subscription stops too
+            queue.put_nowait(_CLOSED)
+            raise StopAsyncIteration
+        return payload
+
+    async def _next_batch(self) -> List[Any]:
+        batch = [await self._next()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0 and self._queue.empty():  # type: ignore
+                break
+            try:
+                batch.append(await self._next(max(remaining, 0)))
+            except (asyncio.TimeoutError, StopAsyncIteration):
+                # closing part way through a batch still yields what we have so far
+                break
+        return batch
+
+    def __aiter__(self) -> 'Subscription':
+        return self
+
+    async def __anext__(self) -> Any:
+        if self.closed:
+            raise StopAsyncIteration
+        await self.start()
+        if self.batched:
+            return await self._next_batch()
+        return await self._next()
+
+    async def aclose(self) -> None:
+        """Stop listening and give the connection back to the pool. Anything waiting for the next
+        notification stops iterating"""
+        self.closed = True
+        if self._queue is not None:
+            self._queue.put_nowait(_CLOSED)
+        await self._release()
+
+    def after_fork(self) -> None:
+        """Called in the child process after a fork. The listening connection belongs to the parent,
+        so rather than UNLISTEN and give it back to the pool we close without ever touching it"""
+        self.closed = True
+        self._queue = None
+        if self._stack is not None:
+            inherit(self._stack)
+            self._stack = None
+
+    async def __aenter__(self) -> 'Subscription':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
@@ -0,0 +1,205 @@
+import asyncio
+import operator
+from time import perf_counter
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Sequence, Union
+
+from yessql.logger import logger
+
+Column = Union[str, int]
+Merge = Callable[[Any, Any], Any]
+
+# Merge functions are called with the buffered value and the new one and return the value to keep.
+# Builtins like max and min work as merge functions too.
+SUM: Merge = operator.add
+
+
+def _last(old: Any, new: Any) -> Any:
+    return new
+
+
+LAST: Merge = _last
+
+
+class WriteBehindStats:
+    """Statistics for a WriteBehind buffer"""
+
+    def __init__(self):
+        self.added = 0
+        self.written = 0
+        self.flushes = 0
+        self.failed = 0
+        self.total_flush = 0.0
+        self.max_flush = 0.0
+
+    @property
+    def coalescing_ratio(self) -> float:
+        """The # of rows added for every row written, E.g. 100.0 means 100 updates became 1 write"""
+        return self.added / self.written if self.written else 0.0
+
+    def flushed(self, rows: int, elapsed: float) -> None:
+        """Record a flush that wrote rows in elapsed seconds"""
+        self.flushes += 1
+        self.written += rows
+        self.total_flush += elapsed
+        self.max_flush = max(self.max_flush, elapsed)
+
+    @property
+    def mean_flush(self) -> float:
+        return self.total_flush / self.flushes if self.flushes else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'added': self.added,
+            'written': self.written,
+            'coalescing_ratio': self.coalescing_ratio,
+            'flushes': self.flushes,
+            'failed': self.failed,
+            'mean_flush': self.mean_flush,
+            'max_flush': self.max_flush,
+        }
+
+
+class WriteBehind:
+    """**Write Behind Buffer**
+
+    Buffers rows for a write statement in memory and coalesces rows that share a key, so that
+    thousands of updates to the same few keys (E.g. incrementing counters or setting "last seen"
+    timestamps) become a single write per key every `interval` seconds. Create one with a client's
+    `write_behind` method, which also makes sure it is flushed when the client's pool is closed.
+
+    Rows are the same dicts (AioPostgres) or tuples (AioMySQL) you would pass to `write`, and the
+    statement should be an upsert that applies a row to whatever is already in the table.
+
+    Buffered rows are lost if the process dies before they are flushed, so only use this for writes
+    where that is an acceptable trade for throughput.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        stmt: str,
+        key: Union[Column, Sequence[Column]],
+        merge: Union[Merge, Mapping[Column, Merge]] = LAST,
+        interval: float = 1.0,
+        max_keys: int = None,
+        lane: str = None,
+    ):
+        """
+        Args:
+            client: The async client to write with
+            stmt: The upsert statement the coalesced rows are written with
+            key: The column name (for dict rows) or index (for tuple rows), or a sequence of them,
+                that identifies rows to coalesce
+            merge: How to combine a new row with a buffered row for the same key. Either a function
+                that merges whole rows or a mapping of column to merge function, in which case any
+                column not in the mapping keeps the value from the newest row. Defaults to LAST,
+                which keeps the newest row
+            interval: The # of seconds between flushes
+            max_keys: Flush early once this many keys are buffered. None only flushes on interval
+            lane: The name of the lane to write with, if the client has lanes configured
+        """
+        self.client = client
+        self.stmt = stmt
+        self.key_columns = tuple(key) if isinstance(key, (list, tuple)) else (key,)
+        self.merge = merge
+        self.interval = interval
+        self.max_keys = max_keys
+        self.lane = lane
+        self.stats = WriteBehindStats()
+        self.closed = False
+        self._pending: Dict[Hashable, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._early = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def key(self, row: Any) -> Hashable:
+        return tuple(row[column] for column in self.key_columns)
+
+    def merge_rows(self, old: Any, new: Any) -> Any:
+        """Combine a buffered row with a newer row for the same key"""
+        if callable(self.merge):
+            return self.merge(old, new)
+        # the columns are names for dict rows and positions for tuple rows
+        merged: Any = dict(new) if isinstance(new, Mapping) else list(new)
+        for column, merge in self.merge.items():
+            merged[column] = merge(old[column], new[column])
+        return merged if isinstance(merged, dict) else tuple(merged)
+
+    def add(self, row: Any) -> None:
+        """
+        Buffer a row to be written on the next flush. Must be called from within the event loop.
+        Args:
+            row: A row for the statement, as you would pass to the client's `write`
+        """
+        if self.closed:
+            raise ValueError('Unable to add rows to a closed WriteBehind buffer')
+        key = self.key(row)
+        pending = self._pending.get(key)
+        self._pending[key] = row if pending is None else self.merge_rows(pending, row)
+        self.stats.added += 1
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_periodically())
+        if self.max_keys is not None and len(self._pending) >= self.max_keys and not self._early:
+            self._early = True
+            self._task.cancel()
+            self._task = asyncio.get_running_loop().create_task(self._flush_periodically(0))
+
+    async def _flush_periodically(self, delay: float = None) -> None:
+        await asyncio.sleep(self.interval if delay is None else delay)
+        while True:
+            try:
+                # shielded so that rescheduling or closing never interrupts a write part way through
+                await asyncio.shield(self.flush())
+            except Exception:
+                logger.exception(f'Write behind flush failed, keeping {len(self)} rows for retry')
+            await asyncio.sleep(self.interval)
+
+    async def flush(self) -> int:
+        """
+        Write every buffered row now. If the write fails, the rows are put back in the buffer
+        (merged with anything added since) and the error is raised.
+
+        Returns:
+            The # of rows written
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            rows, self._pending = self._pending, {}
+            self._early = False
+            if not rows:
+                return 0
+            start = perf_counter()
+            try:
+                await self.client.write(self.stmt, list(rows.values()), self.lane)
+            except BaseException:
+                self.stats.failed += 1
+                self._restore(rows)
+                raise
+            self.stats.flushed(len(rows), perf_counter() - start)
+            return len(rows)
+
+    def _restore(self, rows: Dict[Hashable, Any]) -> None:
+        """Put rows that failed to write back in the buffer, merged with anything added since"""
+        for key, row in rows.items():
+            newer = self._pending.get(key)
+            self._pending[key] = row if newer is None else self.merge_rows(row, newer)
+
+    async def close(self) -> None:
+        """Stop flushing periodically and write anything that is still buffered"""
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.wait([self._task])
+            self._task = None
+        await self.flush()
+
+    def after_fork(self) -> None:
+        """Forget rows inherited from the parent process, which the parent will write itself"""
+        self._pending = {}
+        self._task = None
+        self._lock = None
+        self._early = False
@@ -1,8 +1,39 @@
 import pytest
 
+from yessql.clients import AsyncDatabaseClient
 from yessql.config import DatabaseConfig, MySQLConfig, PostgresConfig
 
 
+class StubClient(AsyncDatabaseClient):
+    """An AsyncDatabaseClient without a database, for unit testing the behaviour the clients share.
+    Every read yields `rows` and every write is kept in `writes`. Tests subclass it and override
+    whichever methods they need to."""
+
+    def __init__(self, config, min_size=1, max_size=1, rows=(), **kwargs):
+        super().__init__(config, min_size, max_size, **kwargs)
+        self.rows = list(rows)
+        self.writes = []
+
+    async def setup_pool(self):
+        pass
+
+    async def _close_pool(self):
+        pass
+
+    async def _read(self, query, params=None, model=None, lane=None, row_factory=None):
+        for row in self.rows:
+            yield row
+
+    async def explain(self, query, params):
+        return ''
+
+    async def write(self, stmt, params, lane=None, timeout=None):
+        self.writes.append(params)
+
+    async def commit(self, stmt, lane=None, timeout=None):
+        pass
+
+
 @pytest.fixture()
 def mysql_config() -> MySQLConfig:
     return MySQLConfig()
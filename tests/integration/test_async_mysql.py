@@ -1,6 +1,8 @@
+import asyncio
 import uuid
 
 import aiounittest
+import pytest
 
 from yessql import AioMySQL, MySQLConfig
 
@@ -66,3 +68,11 @@ class TestAioMySQL(aiounittest.AsyncTestCase):
             data = await mysql.read_all('SHOW TABLES')
             assert data is not None
         assert mysql.pool._closed is True
+
+    async def test_call_timeout_kills_query(self):
+        async with AioMySQL(self.config, min_size=1, max_size=1) as mysql:
+            with pytest.raises(asyncio.TimeoutError):
+                await mysql.read_all('SELECT SLEEP(5)', timeout=0.2)
+            processes = await asyncio.wait_for(mysql.read_all('SHOW PROCESSLIST'), timeout=2)
+        assert not [process for process in processes if process['Info'] == 'SELECT SLEEP(5)']
+
@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 from asyncio import TimeoutError
 from random import SystemRandom
@@ -131,3 +132,75 @@ class TestAioPostgres(aiounittest.AsyncTestCase):
             )
             await pg.commit("DELETE FROM instruments.guitars WHERE source = 'test-write'")
         assert output == rows
+
+    async def test_paginate(self):
+        async with AioPostgres(self.config) as pg:
+            pages = [
+                page
+                async for page in pg.paginate(
+                    'SELECT * FROM instruments.guitars WHERE source = ${source}',
+                    order_by='id',
+                    page_size=2,
+                    params={'source': 'init'},
+                )
+            ]
+            resumed = [
+                page
+                async for page in pg.paginate(
+                    'SELECT * FROM instruments.guitars WHERE source = ${source}',
+                    order_by='id',
+                    page_size=2,
+                    params={'source': 'init'},
+                    token=pages[0].token,
+                )
+            ]
+        assert [len(page) for page in pages] == [2, 1]
+        assert resumed == pages[1:]
+
+    async def test_abandoned_read_releases_connection(self):
+        async with AioPostgres(self.config, min_size=1, max_size=1) as pg:
+            for _ in range(3):
+                async with pg.read('SELECT * FROM instruments.guitars') as rows:
+                    async for _ in rows:
+                        break
+            data = await asyncio.wait_for(pg.read_all('SELECT 1 AS one'), timeout=5)
+        assert data[0]['one'] == 1
+
+    async def test_write_behind(self):
+        _id = str(uuid.uuid4())
+        async with AioPostgres(self.config) as pg:
+            guitars = pg.write_behind(
+                """INSERT INTO instruments.guitars (id, make, model, type, source)
+                VALUES (${id}, ${make}, ${model}, ${type}, ${source})
+                ON CONFLICT (id) DO UPDATE SET model = EXCLUDED.model""",
+                key='id',
+                interval=60,
+            )
+            for model in ('Stratocaster', 'Jazzmaster', 'Mustang'):
+                row = {'id': _id, 'make': 'Fender', 'type': 'electric', 'source': 'write-behind'}
+                guitars.add({**row, 'model': model})
+        assert guitars.stats.written == 1
+        async with AioPostgres(self.config) as pg:
+            data = await pg.read_all(
+                'SELECT model FROM instruments.guitars WHERE id = ${id}', {'id': _id}
+            )
+            await pg.commit("DELETE FROM instruments.guitars WHERE source = 'write-behind'")
+        assert data[0]['model'] == 'Mustang'
+
+    async def test_call_timeout_releases_connection(self):
+        async with AioPostgres(self.config, min_size=1, max_size=1) as pg:
+            with pytest.raises(TimeoutError):
+                await pg.read_all('SELECT pg_sleep(5)', timeout=0.2)
+            with pytest.raises(TimeoutError):
+                await pg.commit('SELECT pg_sleep(5)', timeout=0.2)
+            data = await asyncio.wait_for(pg.read_all('SELECT 1 AS one'), timeout=2)
+        assert data[0]['one'] == 1
+
+    async def test_subscribe(self):
+        async with AioPostgres(self.config) as pg:
+            async with pg.subscribe('guitars', model=Guitars) as guitars:
+                guitar = make_guitar_row('subscribe')
+                await pg.commit(f"NOTIFY guitars, '{guitar.json()}'")
+                received = await asyncio.wait_for(guitars.__anext__(), timeout=5)
+        assert received == guitar
+
@@ -79,3 +79,26 @@ class TestPg(unittest.TestCase):
             assert next(cur) == [1]
         # this means cursor has been closed
         assert cur.connection is None
+
+    def test_paginate(self):
+        query = "SELECT * FROM instruments.guitars WHERE source = 'init'"
+        pages = list(self.pg.paginate(query, order_by='id', page_size=2))
+        assert [len(page) for page in pages] == [2, 1]
+        resumed = list(self.pg.paginate(query, order_by='id', page_size=2, token=pages[0].token))
+        assert resumed == pages[1:]
+
+    def test_write_batched(self):
+        rows = [(str(uuid.uuid4()), 'test', 'test', 'test', 'blocking-batched') for _ in range(25)]
+        written = self.pg.write(
+            stmt="""INSERT INTO instruments.guitars
+            (id, make, model, type, source) VALUES (%s, %s, %s, %s, %s)""",
+            rows=rows,
+            batch_size=10,
+            commit_every=2,
+        )
+        assert written == 25
+        output = self.pg.read_all(
+            'SELECT id FROM instruments.guitars WHERE source = %s', ('blocking-batched',)
+        )
+        self.pg.commit("DELETE FROM instruments.guitars WHERE source = 'blocking-batched'")
+        assert sorted(str(row['id']) for row in output) == sorted(row[0] for row in rows)
@@ -0,0 +1,41 @@
+import pytest
+
+from yessql.batching import MAX_PARAMS, batches, split_values
+
+
+def test_split_values():
+    values = split_values(
+        'INSERT INTO guitars (id, make) VALUES (%s, lower(%s)) ON CONFLICT (id) DO NOTHING'
+    )
+    assert values.head == 'INSERT INTO guitars (id, make) VALUES '
+    assert values.row == '(%s, lower(%s))'
+    assert values.tail == ' ON CONFLICT (id) DO NOTHING'
+    assert values.params_per_row == 2
+
+
+def test_for_rows():
+    values = split_values('insert into guitars values (%s, %s)')
+    assert values.for_rows(3) == 'insert into guitars values (%s, %s), (%s, %s), (%s, %s)'
+
+
+def test_rows_per_statement_respects_param_limit():
+    values = split_values('INSERT INTO t VALUES (%s, %s, %s, %s, %s)')
+    assert values.rows_per_statement(100) == 100
+    assert values.rows_per_statement(100_000) == MAX_PARAMS // 5
+
+
+def test_split_values_requires_values_row():
+    with pytest.raises(ValueError):
+        split_values('INSERT INTO t SELECT * FROM s')
+
+
+@pytest.mark.parametrize(
+    'stmt', ['INSERT INTO t VALUES (%(id)s, %(name)s)', 'INSERT INTO t VALUES ($1, $2)']
+)
+def test_split_values_requires_placeholders(stmt):
+    with pytest.raises(ValueError):
+        split_values(stmt)
+
+
+def test_batches():
+    assert list(batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,47 @@
+import pytest
+
+from yessql import AioMySQL, AioPostgres
+from yessql.codecs import (
+    MYSQL_JSON,
+    json_dumps,
+    json_loads,
+    mysql_json_codecs,
+    postgres_json_codecs,
+)
+
+
+class CodecConnection:
+    def __init__(self):
+        self.codecs = {}
+
+    async def set_type_codec(self, typename, encoder, decoder, schema, format):
+        self.codecs[typename] = (encoder, decoder, schema, format)
+
+
+def test_json_round_trip():
+    value = {'make': 'fender', 'models': ['jazzmaster', 'mustang'], 'year': 1958}
+    assert json_loads(json_dumps(value)) == value
+    assert isinstance(json_dumps(value), str)
+
+
+def test_json_loads_bytes():
+    assert json_loads(b'{"a": 1}') == {'a': 1}
+
+
+@pytest.mark.asyncio
+async def test_postgres_codecs_registered_on_connection(postgres_config):
+    pg = AioPostgres(postgres_config, codecs=postgres_json_codecs())
+    conn = CodecConnection()
+    await pg.init_connection(conn)
+    assert set(conn.codecs) == {'json', 'jsonb'}
+    encoder, decoder, schema, _ = conn.codecs['jsonb']
+    assert decoder('{"a": [1, 2]}') == {'a': [1, 2]}
+    assert schema == 'pg_catalog'
+
+
+def test_mysql_converters(mysql_config):
+    default = AioMySQL(mysql_config).converters()
+    assert MYSQL_JSON not in default
+    converters = AioMySQL(mysql_config, codecs=mysql_json_codecs()).converters()
+    assert converters[MYSQL_JSON]('[1, 2]') == [1, 2]
+    assert len(converters) == len(default) + 1
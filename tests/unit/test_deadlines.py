@@ -0,0 +1,183 @@
+import asyncio
+
+import pytest
+from conftest import StubClient
+
+from yessql.aiomysql import AioMySQL
+from yessql.deadlines import Hedger, deadline_rows, with_timeout
+
+
+class SlowClient(StubClient):
+    """Each read sleeps for the next of `delays`, so a first read can be slow and its hedge fast"""
+
+    def __init__(self, config, delays):
+        super().__init__(config, 2, 2)
+        self.delays = list(delays)
+        self.cancelled = 0
+
+    async def _read(self, query, params=None, model=None, lane=None, row_factory=None):
+        delay = self.delays.pop(0) if self.delays else 0
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        yield {'delay': delay}
+
+
+@pytest.mark.asyncio
+async def test_with_timeout():
+    assert await with_timeout(asyncio.sleep(0, 'done'), None) == 'done'
+    with pytest.raises(asyncio.TimeoutError):
+        await with_timeout(asyncio.sleep(1), 0.01)
+
+
+@pytest.mark.asyncio
+async def test_deadline_rows_closes_source():
+    closed = asyncio.Event()
+
+    async def rows():
+        try:
+            for i in range(100):
+                await asyncio.sleep(0.005)
+                yield i
+        finally:
+            closed.set()
+
+    seen = []
+    with pytest.raises(asyncio.TimeoutError):
+        async for row in deadline_rows(rows(), 0.02):
+            seen.append(row)
+    assert closed.is_set()
+    assert 0 < len(seen) < 100
+
+
+@pytest.mark.asyncio
+async def test_deadline_rows_never_interrupts_the_consumer():
+    async def rows():
+        for i in range(3):
+            yield i
+
+    stream = deadline_rows(rows(), 0.01)
+    tasks = len(asyncio.all_tasks())
+    assert await stream.__anext__() == 0
+    # no task is created to wait on each row
+    assert len(asyncio.all_tasks()) == tasks
+    # busy with a row past the deadline, which is only raised when asking for the next one
+    await asyncio.sleep(0.02)
+    with pytest.raises(asyncio.TimeoutError):
+        await stream.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_deadline_rows_cancelled_elsewhere():
+    async def rows():
+        await asyncio.sleep(1)
+        yield 1
+
+    async def consume():
+        return [row async for row in deadline_rows(rows(), 1)]
+
+    task = asyncio.get_running_loop().create_task(consume())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_read_timeout(database_config):
+    client = SlowClient(database_config, [1])
+    with pytest.raises(asyncio.TimeoutError):
+        await client.read_all('SELECT 1', timeout=0.01)
+    assert client.cancelled == 1
+    async with client.read('SELECT 1', timeout=1) as rows:
+        assert [row async for row in rows] == [{'delay': 0}]
+
+
+def test_hedger_waits_for_samples():
+    hedger = Hedger(min_samples=3)
+    for latency in (0.1, 0.2):
+        hedger.record('SELECT 1', latency)
+    assert hedger.delay('SELECT 2') is None
+    hedger.record('SELECT  3', 0.3)
+    assert hedger.delay('SELECT 1') == 0.3
+
+
+@pytest.mark.asyncio
+async def test_hedged_read_uses_fastest(database_config):
+    client = SlowClient(database_config, [1, 0])
+    client.hedger = Hedger(min_samples=1)
+    client.hedger.record('SELECT 1', 0.01)
+    assert await client.read_all('SELECT 1', hedge=True) == [{'delay': 0}]
+    assert client.hedge_stats() == {'reads': 1, 'hedged': 1, 'hedge_wins': 1}
+    assert client.cancelled == 1
+    # the cancelled primary is recorded for as long as it ran, as well as the hedge that won
+    assert len(client.hedger.latencies['SELECT ?']) == 3
+    assert max(client.hedger.latencies['SELECT ?']) >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_hedged_read_without_samples_is_not_hedged(database_config):
+    client = SlowClient(database_config, [0.02])
+    assert await client.read_all('SELECT 1', hedge=True) == [{'delay': 0.02}]
+    assert client.hedge_stats()['hedged'] == 0
+
+
+@pytest.mark.asyncio
+async def test_hedged_read_raises_when_every_read_fails():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('failed')
+
+    hedger = Hedger(min_samples=1)
+    hedger.record('SELECT 1', 0.001)
+    with pytest.raises(ValueError):
+        await hedger.run('SELECT 1', fail)
+
+
+class FakeMySQLConnection:
+    def __init__(self):
+        self.closed = False
+        self.cursor_closed = False
+
+    async def cursor(self, cursor_class):
+        conn = self
+
+        class Cursor:
+            async def close(self):
+                conn.cursor_closed = True
+
+        return Cursor()
+
+    def thread_id(self):
+        return 42
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_mysql_cancelled_query_is_killed(mysql_config):
+    client = AioMySQL(mysql_config)
+    killed = []
+
+    async def kill_query(thread_id):
+        killed.append(thread_id)
+
+    client.kill_query = kill_query
+    conn = FakeMySQLConnection()
+
+    async def slow_query():
+        async with client.cursor(conn):
+            await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(slow_query(), 0.01)
+    assert killed == [42]
+    assert conn.closed and not conn.cursor_closed
+
+    conn = FakeMySQLConnection()
+    async with client.cursor(conn):
+        pass
+    assert conn.cursor_closed and not conn.closed
@@ -0,0 +1,73 @@
+import pytest
+from pydantic import BaseModel
+
+from yessql.aiomysql import AioMySQL
+from yessql.aiopostgres.client import AioPostgres
+from yessql.codecs import postgres_json_codecs
+from yessql.fakes import FakeDatabase, FakeRecord
+from yessql.postgres import Postgres
+from yessql.rows import tuple_row
+
+
+class Row(BaseModel):
+    id: int
+    name: str
+
+
+def test_fake_record():
+    record = FakeRecord((1, 'a'), {'id': 0, 'name': 1})
+    assert record[0] == record['id'] == 1
+    assert list(record) == [1, 'a']
+    assert dict(record.items()) == {'id': 1, 'name': 'a'}
+    assert Row(**record) == Row(id=1, name='a')
+
+
+@pytest.mark.asyncio
+async def test_aiopostgres(postgres_config):
+    db = FakeDatabase(columns=['id', 'name'], rows=120)
+    async with db.attach(AioPostgres(postgres_config, codecs=postgres_json_codecs())) as pg:
+        rows = await pg.read_all('SELECT * FROM t WHERE id > ${id}', {'id': 1})
+        assert len(rows) == 120 and rows[1]['name'] == 'name-1'
+        assert (await pg.read_all('SELECT * FROM t', model=Row))[2] == Row(id=2, name='name-2')
+        await pg.write('INSERT INTO t VALUES (${id}, ${name})', [{'id': 1, 'name': 'a'}])
+        await pg.commit('TRUNCATE t')
+    # every 50 rows of a read is another round trip, like asyncpg's cursor prefetch
+    assert db.queries == 3 + 3 + 2
+    assert db.written == 1
+    assert pg.pool._closed
+
+
+@pytest.mark.asyncio
+async def test_aiomysql(mysql_config):
+    db = FakeDatabase(columns=['id', 'name'], rows=3)
+    async with db.attach(AioMySQL(mysql_config)) as mysql:
+        assert (await mysql.read_all('SELECT * FROM t'))[0] == {'id': 0, 'name': 'name-0'}
+        mysql.row_factory = tuple_row
+        assert (await mysql.read_all('SELECT * FROM t'))[2] == (2, 'name-2')
+        await mysql.write('INSERT INTO t VALUES (%s, %s)', [(1, 'a'), (2, 'b')])
+    assert db.written == 2
+
+
+def test_postgres(postgres_config):
+    db = FakeDatabase(columns=['id', 'name'], rows=5, row=lambda i: (i, str(i)))
+    with db.attach(Postgres(postgres_config, codecs=postgres_json_codecs())) as pg:
+        assert pg.read_all('SELECT * FROM t WHERE id = %s', (1,))[4] == {'id': 4, 'name': '4'}
+        assert pg.write('INSERT INTO t VALUES (%s, %s)', [(1, 'a'), (2, 'b')]) == 2
+        written = pg.write('INSERT INTO t VALUES (%s, %s)', [(1, 'a')] * 5, batch_size=2)
+        assert written == 5
+    assert sorted(pg.connection.adapters) == [114, 3802]
+    assert db.written == 7
+
+
+@pytest.mark.parametrize('batch_size, commit_every', [(0, 1), (-1, 1), (2, 0)])
+def test_postgres_write_rejects_bad_batching(postgres_config, batch_size, commit_every):
+    db = FakeDatabase()
+    with db.attach(Postgres(postgres_config)) as pg:
+        with pytest.raises(ValueError):
+            pg.write('INSERT INTO t VALUES (%s)', [(1,)], batch_size, commit_every)
+    assert db.written == 0
+
+
+def test_attach_unknown_client():
+    with pytest.raises(TypeError):
+        FakeDatabase().attach(object())
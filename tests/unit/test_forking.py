@@ -0,0 +1,161 @@
+import asyncio
+import multiprocessing
+import os
+from contextlib import asynccontextmanager
+
+import pytest
+from conftest import StubClient
+
+from yessql.aiopostgres.client import AioPostgres
+from yessql.fakes import FakeDatabase
+from yessql.forking import per_process_pool_size
+from yessql.postgres import Postgres
+from yessql.utils import PendingConnection
+
+fork = pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+
+
+class FakePool:
+    def __init__(self):
+        self.pid = os.getpid()
+
+    @asynccontextmanager
+    async def acquire(self):
+        await asyncio.sleep(0)
+        yield self.pid
+
+    async def close(self):
+        pass
+
+
+class FakeClient(StubClient):
+    def __init__(self, config):
+        super().__init__(config)
+        self.setups = 0
+
+    async def setup_pool(self):
+        self.setups += 1
+        await asyncio.sleep(0.01)
+        self.pool = FakePool()
+
+
+class FakeConnection:
+    def __init__(self):
+        self.pid = os.getpid()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def run_in_child(target, *args):
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    process = context.Process(target=lambda: results.put(target(*args)))
+    process.start()
+    result = results.get(timeout=10)
+    process.join(timeout=10)
+    return result
+
+
+@fork
+def test_async_client_rebuilds_pool_after_fork(database_config):
+    client = FakeClient(database_config)
+    asyncio.run(client.setup_pool())
+    parent_pool = client.pool
+
+    async def acquire_many():
+        async def acquire():
+            async with client.acquire() as pid:
+                return pid
+
+        return await asyncio.gather(*(acquire() for _ in range(5)))
+
+    def child():
+        reset = client.reconnect and isinstance(client.pool, PendingConnection)
+        pids = asyncio.run(acquire_many())
+        return reset, set(pids), os.getpid(), client.setups
+
+    reset, pids, child_pid, setups = run_in_child(child)
+    assert reset
+    assert pids == {child_pid}
+    # one setup in the parent and only one more in the child however many callers raced
+    assert setups == 2
+    assert client.pool is parent_pool and not client.reconnect
+
+
+@fork
+def test_subscriptions_leave_inherited_connection_alone_after_fork(postgres_config):
+    db = FakeDatabase()
+    pg = db.attach(AioPostgres(postgres_config, max_size=1))
+    subscription = pg.subscribe('guitars')
+
+    async def listen():
+        await pg.setup_pool()
+        await subscription.start()
+
+    # not asyncio.run, which would finalize the checkout and give the connection back on exit
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(listen())
+    parent_pool = pg.pool
+
+    async def close():
+        closed = subscription.closed and not pg.subscriptions
+        await subscription.aclose()
+        await pg.close_pool()
+        return closed
+
+    def child():
+        closed = asyncio.run(close())
+        return closed, len(db.listeners['guitars']), parent_pool._free.qsize()
+
+    closed, listeners, free = run_in_child(child)
+    assert closed
+    # no UNLISTEN was sent and the connection wasn't given back to the parent's pool
+    assert listeners == 1 and free == 0
+    loop.run_until_complete(pg.close_pool())
+    loop.close()
+    assert db.listeners['guitars'] == []
+
+
+@fork
+def test_blocking_client_reconnects_after_fork(postgres_config):
+    pg = Postgres(postgres_config)
+    parent_connection = pg.connection = FakeConnection()
+    pg.setup_connection = lambda: setattr(pg, 'connection', FakeConnection())
+
+    def child():
+        pid = pg.connection.pid
+        pg.close_connection()
+        return pid, os.getpid(), parent_connection.closed
+
+    pid, child_pid, inherited_closed = run_in_child(child)
+    assert pid == child_pid
+    assert not inherited_closed
+    assert pg.connection is parent_connection
+
+
+@fork
+def test_unconnected_client_is_left_alone_after_fork(postgres_config):
+    pg = Postgres(postgres_config)
+    assert run_in_child(lambda: pg.reconnect) is False
+
+
+def test_per_process_pool_size():
+    assert per_process_pool_size(100, processes=8) == 12
+    assert per_process_pool_size(100, processes=8, reserve=20) == 10
+    assert per_process_pool_size(4, processes=8) == 1
+    assert per_process_pool_size(4, processes=8, min_size=2) == 2
+
+
+def test_per_process_pool_size_from_environment(monkeypatch):
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    assert per_process_pool_size(40) == 10
+    with pytest.raises(ValueError):
+        per_process_pool_size(40, processes=0)
+
+
+def test_connection_budget_sets_max_size(monkeypatch, postgres_config):
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    pg = AioPostgres(postgres_config, min_size=5, connection_budget=12)
+    assert (pg.min_size, pg.max_size) == (3, 3)
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+from typing import Dict
+
+DRIVERS = ('aiomysql', 'asyncpg', 'pg8000', 'pydantic', 'pipe')
+
+
+def import_times(code: str) -> Dict[str, int]:
+    """Run code in a fresh interpreter and return the cumulative import time (us) per module"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, module = line.split('|')
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_import_does_not_load_drivers():
+    times = import_times('import yessql')
+    assert 'yessql' in times
+    assert not [module for module in times if module.split('.')[0] in DRIVERS]
+
+
+def test_clients_only_load_their_own_driver():
+    times = import_times('from yessql import AioPostgres')
+    assert 'asyncpg' in times
+    assert 'aiomysql' not in times
+    assert 'pg8000' not in times
+
+
+def test_lazy_attributes():
+    import yessql
+    from yessql.postgres import Postgres
+
+    assert yessql.Postgres is Postgres
+    assert 'AioMySQL' in dir(yessql)
+    # loaded attributes are cached in the module globals, but are still only listed once
+    assert dir(yessql).count('Postgres') == 1
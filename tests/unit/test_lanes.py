@@ -0,0 +1,85 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from yessql import Lane
+from yessql.lanes import LaneScheduler
+
+
+class CountingPool:
+    def __init__(self):
+        self.acquired = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.acquired += 1
+        try:
+            yield object()
+        finally:
+            self.acquired -= 1
+
+
+def make_scheduler(capacity=2):
+    lanes = [Lane('interactive', priority=0, reserved=1), Lane('batch', priority=10)]
+    return LaneScheduler(capacity, lanes)
+
+
+def test_reservations_cannot_exceed_capacity():
+    with pytest.raises(ValueError):
+        LaneScheduler(1, [Lane('a', reserved=1), Lane('b', reserved=1)])
+
+
+def test_unknown_lane():
+    with pytest.raises(ValueError):
+        make_scheduler().lane('nope')
+
+
+@pytest.mark.asyncio
+async def test_reserved_connections_are_kept_for_their_lane():
+    scheduler, pool = make_scheduler(), CountingPool()
+    async with scheduler.acquire(pool, 'batch'):
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(_hold(scheduler, pool, 'batch'), timeout=0.05)
+        async with scheduler.acquire(pool, 'interactive'):
+            assert pool.acquired == 2
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_by_priority():
+    scheduler = LaneScheduler(1, [Lane('interactive', priority=0), Lane('batch', priority=10)])
+    pool, order = CountingPool(), []
+
+    async def use(lane):
+        async with scheduler.acquire(pool, lane):
+            order.append(lane)
+
+    async with scheduler.acquire(pool, 'batch'):
+        tasks = [asyncio.create_task(use(lane)) for lane in ('batch', 'batch', 'interactive')]
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+    assert order == ['interactive', 'batch', 'batch']
+    stats = scheduler.report()
+    assert stats['batch']['acquired'] == 3
+    assert stats['interactive']['max_wait'] > 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    scheduler = LaneScheduler(1, [Lane('default')])
+    pool = CountingPool()
+    async with scheduler.acquire(pool):
+        task = asyncio.create_task(_hold(scheduler, pool, 'default'))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    assert scheduler.in_use == 0
+    async with scheduler.acquire(pool):
+        assert scheduler.in_use == 1
+
+
+async def _hold(scheduler, pool, lane):
+    async with scheduler.acquire(pool, lane):
+        await asyncio.sleep(10)
@@ -0,0 +1,80 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from yessql import AioMySQL, AioPostgres, NamedParams
+from yessql.fakes import FakeDatabase
+from yessql.pagination import decode_token, encode_token, keyset_query, page_key
+from yessql.postgres import Postgres
+from yessql.rows import tuple_row
+
+
+def test_first_page_query():
+    query = keyset_query('SELECT * FROM guitars', ['id'], 10, None)
+    assert query == 'SELECT * FROM (SELECT * FROM guitars) AS _yessql_page ORDER BY id LIMIT 10'
+
+
+def test_next_page_query():
+    query = keyset_query('SELECT * FROM guitars', ['make', 'id'], 10, ['%s', '%s'])
+    assert 'WHERE (make, id) > (%s, %s) ORDER BY make, id LIMIT 10' in query
+
+
+def test_token_round_trip():
+    key = (1, 'fender', uuid.uuid4(), datetime(2022, 1, 2, 3, 4, 5), Decimal('1.50'), None)
+    assert decode_token(encode_token(key)) == key
+
+
+def test_token_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        encode_token([object()])
+
+
+def test_page_key_from_mapping_and_attributes():
+    class Row:
+        id = 2
+
+    assert page_key({'id': 1}, ['id']) == (1,)
+    assert page_key(Row(), ['id']) == (2,)
+
+
+def test_page_key_from_sequences():
+    assert page_key((1, 'fender'), ['make', 'id'], ['id', 'make']) == ('fender', 1)
+    assert page_key([3, 'gibson'], ['id'], ['id', 'make']) == (3,)
+    with pytest.raises(ValueError):
+        page_key((1, 'fender'), ['model'], ['id', 'make'])
+
+
+@pytest.mark.asyncio
+async def test_paginate_tuple_rows(mysql_config):
+    db = FakeDatabase(columns=['id', 'name'], rows=3)
+    async with db.attach(AioMySQL(mysql_config, row_factory=tuple_row)) as mysql:
+        pages = [page async for page in mysql.paginate('SELECT * FROM t', 'name', page_size=5)]
+    assert pages == [[(0, 'name-0'), (1, 'name-1'), (2, 'name-2')]]
+    assert decode_token(pages[0].token) == ('name-2',)
+
+
+def test_blocking_paginate_tuple_rows(postgres_config):
+    db = FakeDatabase(columns=['id', 'name'], rows=3)
+    with db.attach(Postgres(postgres_config, row_factory=tuple_row)) as pg:
+        pages = list(pg.paginate('SELECT * FROM t', ['id'], page_size=5))
+    assert decode_token(pages[0].token) == (2,)
+
+
+def test_postgres_keyset_params(postgres_config):
+    pg = AioPostgres(postgres_config)
+    placeholders, params = pg.keyset_params({'source': 'init'}, ('fender', 3))
+    query = keyset_query(
+        'SELECT * FROM t WHERE source = ${source}', ['make', 'id'], 5, placeholders
+    )
+    parsed = query.format_map(NamedParams(**params))
+    assert parsed.endswith('WHERE (make, id) > ($2, $3) ORDER BY make, id LIMIT 5')
+    assert list(params.values()) == ['init', 'fender', 3]
+
+
+def test_mysql_keyset_params(mysql_config):
+    mysql = AioMySQL(mysql_config)
+    assert mysql.keyset_params(None, None) == (None, None)
+    assert mysql.keyset_params(('init',), (3,)) == (['%s'], ('init', 3))
+
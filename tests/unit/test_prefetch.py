@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from yessql.prefetch import prefetch_rows, prefetch_rows_threaded
+
+
+class Source:
+    def __init__(self, n, fail_at=None):
+        self.n = n
+        self.fail_at = fail_at
+        self.closed = False
+
+    async def arows(self):
+        try:
+            for i in range(self.n):
+                if i == self.fail_at:
+                    raise ValueError(i)
+                await asyncio.sleep(0)
+                yield i
+        finally:
+            self.closed = True
+
+    def rows(self):
+        try:
+            for i in range(self.n):
+                if i == self.fail_at:
+                    raise ValueError(i)
+                yield i
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_prefetch_rows():
+    source = Source(25)
+    rows = [row async for row in prefetch_rows(source.arows(), batches=2, batch_size=10)]
+    assert rows == list(range(25))
+    assert source.closed
+
+
+@pytest.mark.asyncio
+async def test_prefetch_rows_raises_errors():
+    rows = prefetch_rows(Source(25, fail_at=12).arows(), batches=2, batch_size=10)
+    with pytest.raises(ValueError):
+        async for _ in rows:
+            pass
+
+
+@pytest.mark.asyncio
+async def test_prefetch_rows_close_stops_reading():
+    source = Source(1000)
+    rows = prefetch_rows(source.arows(), batches=2, batch_size=10)
+    assert await rows.__anext__() == 0
+    await rows.aclose()
+    assert source.closed
+
+
+def test_prefetch_rows_threaded():
+    source = Source(25)
+    assert list(prefetch_rows_threaded(source.rows(), batches=2, batch_size=10)) == list(range(25))
+    assert source.closed
+
+
+def test_prefetch_rows_threaded_raises_errors():
+    with pytest.raises(ValueError):
+        list(prefetch_rows_threaded(Source(25, fail_at=12).rows(), batches=2, batch_size=10))
+
+
+def test_prefetch_rows_threaded_close_stops_reading():
+    source = Source(1000)
+    rows = prefetch_rows_threaded(source.rows(), batches=2, batch_size=10)
+    assert next(rows) == 0
+    rows.close()
+    assert source.closed
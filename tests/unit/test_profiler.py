@@ -0,0 +1,125 @@
+import io
+import json
+import logging
+
+import pytest
+
+from yessql import AioPostgres, Postgres, QueryProfiler
+from yessql.fakes import FakeDatabase
+from yessql.profiler import counted, normalize_query
+from yessql.rows import tuple_row
+
+
+async def _cursor(rows):
+    for row in rows:
+        yield row
+
+
+def test_normalize_query():
+    query = "SELECT *  FROM guitars\n WHERE id = 10 AND make = 'fender' AND model = $1"
+    expected = 'SELECT * FROM guitars WHERE id = ? AND make = ? AND model = $1'
+    assert normalize_query(query) == expected
+
+
+def test_record_aggregates_per_normalized_query():
+    profiler = QueryProfiler()
+    for i in range(1, 21):
+        profiler.record(f'SELECT * FROM guitars WHERE id = {i}', database=i / 100, rows=1)
+
+    [stats] = profiler.report()
+    assert stats['count'] == 20
+    assert stats['rows'] == 20
+    assert stats['total'] == pytest.approx(2.1)
+    assert stats['p95'] == pytest.approx(0.19)
+
+
+def test_slow_queries_are_logged(caplog):
+    profiler = QueryProfiler(slow_threshold=0.5)
+    with caplog.at_level(logging.WARNING, logger='yessql.logger'):
+        assert profiler.record('SELECT 1', database=1.0) is True
+        assert profiler.record('SELECT 1', database=0.1) is False
+    assert len(caplog.records) == 1
+
+
+def test_needs_plan_only_for_slow_queries_with_explain():
+    profiler = QueryProfiler(slow_threshold=0.5, explain=True)
+    profiler.record('SELECT 1', database=1.0)
+    assert profiler.needs_plan('SELECT 1')
+    profiler.add_plan('SELECT 1', 'Result')
+    assert not profiler.needs_plan('SELECT 1')
+    assert not QueryProfiler(slow_threshold=0.5).needs_plan('SELECT 1')
+
+
+def test_profile_rows():
+    profiler = QueryProfiler()
+    rows = list(profiler.profile_rows('SELECT 1', [[1], [2]], tuple_row(['a']), started=0.0))
+    assert rows == [(1,), (2,)]
+    assert profiler.report()[0]['rows'] == 2
+
+
+def test_profile_rows_records_when_abandoned():
+    profiler = QueryProfiler()
+    rows = profiler.profile_rows('SELECT 1', [[1], [2]], tuple_row(['a']), started=0.0)
+    next(rows)
+    rows.close()
+    assert profiler.report()[0]['rows'] == 1
+
+
+@pytest.mark.asyncio
+async def test_aprofile_rows():
+    profiler = QueryProfiler()
+    rows = profiler.aprofile_rows('SELECT 1', _cursor([[1], [2]]), tuple_row(['a']), 0.0)
+    assert [row async for row in rows] == [(1,), (2,)]
+    assert profiler.report()[0]['count'] == 1
+
+
+def test_dump():
+    profiler = QueryProfiler()
+    with profiler.timed('SELECT 1'):
+        pass
+    fp = io.StringIO()
+    profiler.dump(fp)
+    assert json.loads(fp.getvalue())[0]['query'] == 'SELECT ?'
+
+
+def test_counted_only_wraps_unsized_rows_when_profiling():
+    rows = (row for row in [(1,), (2,)])
+    assert counted(None, rows) is rows
+    assert counted(QueryProfiler(), [(1,)]) == [(1,)]
+    assert list(counted(QueryProfiler(), rows)) == [(1,), (2,)]
+
+
+@pytest.mark.parametrize('batch_size', [None, 2])
+def test_writes_count_generator_rows(postgres_config, batch_size):
+    profiler = QueryProfiler()
+    db = FakeDatabase()
+    with db.attach(Postgres(postgres_config, profiler=profiler)) as pg:
+        rows = ((i, 'a') for i in range(5))
+        pg.write('INSERT INTO t VALUES (%s, %s)', rows, batch_size=batch_size)
+    [stats] = profiler.report()
+    assert stats['rows'] == 5
+    assert db.written == 5
+
+
+@pytest.mark.asyncio
+async def test_plan_is_captured_outside_the_read_timeout(postgres_config):
+    profiler = QueryProfiler(slow_threshold=0, explain=True)
+    # a read and its EXPLAIN each take one 0.05s round trip, so only the read fits in the timeout
+    db = FakeDatabase(columns=['id', 'name'], rows=10, latency=0.05)
+    async with db.attach(AioPostgres(postgres_config, profiler=profiler)) as pg:
+        assert len(await pg.read_all('SELECT * FROM t', timeout=0.08)) == 10
+        assert profiler.report()[0]['plan'] is None
+        await pg.wait_for_plans()
+        assert profiler.report()[0]['plan'] == 'Fake Scan'
+
+
+def test_plan_is_captured_after_the_read(postgres_config):
+    profiler = QueryProfiler(slow_threshold=0, explain=True)
+    db = FakeDatabase(columns=['id', 'name'], rows=3)
+    with db.attach(Postgres(postgres_config, profiler=profiler)) as pg:
+        rows = pg.read('SELECT * FROM t')
+        assert len([next(rows) for _ in range(3)]) == 3
+        assert db.queries == 1
+        assert list(rows) == []
+        assert db.queries == 2
+    assert profiler.report()[0]['plan'] == 'Fake Scan'
@@ -0,0 +1,27 @@
+from yessql import dict_row, raw_row, record_row, tuple_row
+
+KEYS = ['id', 'name', '?column?']
+ROW = [1, 'strat', True]
+
+
+def test_dict_row():
+    assert dict_row(KEYS)(ROW) == {'id': 1, 'name': 'strat', '?column?': True}
+
+
+def test_tuple_row():
+    assert tuple_row(KEYS)(ROW) == (1, 'strat', True)
+
+
+def test_raw_row():
+    assert raw_row(KEYS)(ROW) is ROW
+
+
+def test_record_row():
+    row = record_row(KEYS)(ROW)
+    assert row.id == 1
+    assert row.name == 'strat'
+    assert tuple(row) == (1, 'strat', True)
+
+
+def test_record_row_shares_class():
+    assert type(record_row(KEYS)(ROW)) is type(record_row(KEYS)(ROW))
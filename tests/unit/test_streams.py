@@ -0,0 +1,89 @@
+import asyncio
+import gc
+
+import pytest
+from conftest import StubClient
+
+from yessql.aiomysql import AioMySQL
+from yessql.fakes import FakeDatabase
+from yessql.streams import ReadStream
+
+
+class SingleConnectionClient(StubClient):
+    """A client whose 'pool' only has a single connection, so a leaked checkout starves it"""
+
+    async def setup_pool(self):
+        self.pool = asyncio.Semaphore(1)
+
+    async def _read(self, query, params=None, model=None, lane=None, row_factory=None):
+        async with self.pool:
+            for i in range(10):
+                yield {'id': i}
+
+
+@pytest.mark.asyncio
+async def test_break_releases_connection(database_config):
+    async with SingleConnectionClient(database_config, 1, 1) as client:
+        for _ in range(3):
+            async with client.read('SELECT 1') as rows:
+                async for _ in rows:
+                    break
+        data = await asyncio.wait_for(client.read_all('SELECT 1'), timeout=1)
+    assert len(data) == 10
+
+
+@pytest.mark.asyncio
+async def test_mysql_break_kills_query(mysql_config):
+    db = FakeDatabase(columns=['id', 'name'], rows=10)
+    async with db.attach(AioMySQL(mysql_config, max_size=1)) as mysql:
+        async with mysql.pool.acquire() as conn:
+            thread_id = conn.thread_id()
+        async with mysql.read('SELECT * FROM t') as rows:
+            async for _ in rows:
+                break
+        # the abandoned connection is closed rather than drained and put back in the pool
+        assert db.killed == [thread_id] and conn.closed
+        assert len(await mysql.read_all('SELECT * FROM t')) == 10
+    assert db.killed == [thread_id]
+
+
+@pytest.mark.asyncio
+async def test_cancel_releases_connection(database_config):
+    async def slow_consumer(client):
+        async with client.read('SELECT 1') as rows:
+            async for _ in rows:
+                await asyncio.sleep(10)
+
+    async with SingleConnectionClient(database_config, 1, 1) as client:
+        task = asyncio.create_task(slow_consumer(client))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not client.pool.locked()
+
+
+@pytest.mark.asyncio
+async def test_unclosed_stream_warns():
+    async def rows():
+        yield 1
+        yield 2
+
+    stream = ReadStream(rows())
+    await stream.__anext__()
+    with pytest.warns(ResourceWarning):
+        del stream
+        gc.collect()
+
+
+@pytest.mark.asyncio
+async def test_exhausted_stream_does_not_warn(recwarn):
+    async def rows():
+        yield 1
+
+    stream = ReadStream(rows())
+    assert [row async for row in stream] == [1]
+    assert stream.closed
+    del stream
+    gc.collect()
+    assert not [w for w in recwarn if w.category is ResourceWarning]
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from yessql.aiopostgres.client import AioPostgres
+from yessql.fakes import FakeDatabase
+
+
+class Guitar(BaseModel):
+    id: int
+    make: str
+
+
+async def next_within(subscription, timeout=1):
+    return await asyncio.wait_for(subscription.__anext__(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_subscribe(postgres_config):
+    db = FakeDatabase()
+    async with db.attach(AioPostgres(postgres_config, max_size=1)) as pg:
+        async with pg.subscribe('guitars') as guitars:
+            db.notify('guitars', 'first')
+            db.notify('other', 'ignored')
+            db.notify('guitars', 'second')
+            assert await next_within(guitars) == 'first'
+            assert await next_within(guitars) == 'second'
+        assert db.listeners['guitars'] == []
+        # the connection went back to the pool
+        assert len(await asyncio.wait_for(pg.read_all('SELECT 1'), timeout=1)) == 1000
+
+
+@pytest.mark.asyncio
+async def test_subscribe_model_skips_bad_payloads(postgres_config):
+    db = FakeDatabase()
+    async with db.attach(AioPostgres(postgres_config)) as pg:
+        async with pg.subscribe('guitars', model=Guitar) as guitars:
+            db.notify('guitars', 'not json')
+            db.notify('guitars', '{"id": "not an int", "make": "Fender"}')
+            db.notify('guitars', '{"id": 1, "make": "Gibson"}')
+            assert await next_within(guitars) == Guitar(id=1, make='Gibson')
+
+
+@pytest.mark.asyncio
+async def test_subscribe_batches(postgres_config):
+    db = FakeDatabase()
+    async with db.attach(AioPostgres(postgres_config)) as pg:
+        async with pg.subscribe('guitars', batch_size=3, batch_window=0.05) as guitars:
+            for i in range(4):
+                db.notify('guitars', str(i))
+            assert await next_within(guitars) == ['0', '1', '2']
+            # a batch that isn't full is yielded once the window has passed
+            assert await next_within(guitars) == ['3']
+
+
+@pytest.mark.asyncio
+async def test_subscribe_reconnects(postgres_config):
+    db = FakeDatabase()
+    async with db.attach(AioPostgres(postgres_config, max_size=1)) as pg:
+        subscription = pg.subscribe('guitars')
+        async with subscription as guitars:
+            (conn, _), = db.listeners['guitars']
+            conn.terminate()
+            waiting = asyncio.create_task(next_within(guitars))
+            await asyncio.sleep(0.2)
+            assert len(db.listeners['guitars']) == 1
+            db.notify('guitars', 'after reconnect')
+            assert await waiting == 'after reconnect'
+        assert subscription.reconnects == 1
+
+
+@pytest.mark.asyncio
+async def test_close_pool_closes_subscriptions(postgres_config):
+    db = FakeDatabase()
+    async with db.attach(AioPostgres(postgres_config)) as pg:
+        subscription = pg.subscribe('guitars')
+        await subscription.start()
+    assert subscription.closed
+    assert db.listeners['guitars'] == []
+    with pytest.raises(StopAsyncIteration):
+        await subscription.__anext__()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('batch_size', [1, 10])
+async def test_close_stops_waiting_consumers(postgres_config, batch_size):
+    db = FakeDatabase()
+    pg = db.attach(AioPostgres(postgres_config))
+    await pg.setup_pool()
+    guitars = pg.subscribe('guitars', batch_size=batch_size, batch_window=5)
+    await guitars.start()
+
+    async def consume():
+        return [guitar async for guitar in guitars]
+
+    consumer = asyncio.get_running_loop().create_task(consume())
+    db.notify('guitars', 'first')
+    await asyncio.sleep(0.01)
+    await pg.close_pool()
+    received = await asyncio.wait_for(consumer, timeout=1)
+    assert received == (['first'] if batch_size == 1 else [['first']])
@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from conftest import StubClient
+
+from yessql.aiomysql import AioMySQL
+from yessql.aiopostgres.client import AioPostgres
+from yessql.fakes import FakeDatabase
+from yessql.writebehind import LAST, SUM, WriteBehind
+
+
+class RecordingClient(StubClient):
+    def __init__(self, config, fail=0):
+        super().__init__(config)
+        self.fail = fail
+
+    async def write(self, stmt, params, lane=None, timeout=None):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError('database is down')
+        await super().write(stmt, params, lane, timeout)
+
+
+@pytest.mark.asyncio
+async def test_coalesces_dict_rows_by_column(database_config):
+    client = RecordingClient(database_config)
+    buffer = client.write_behind('UPSERT', key='page', merge={'hits': SUM}, interval=60)
+    for i in range(10):
+        buffer.add({'page': f'/{i % 2}', 'hits': 1, 'seen': i})
+    assert await buffer.flush() == 2
+    assert sorted(client.writes[0], key=lambda row: row['page']) == [
+        {'page': '/0', 'hits': 5, 'seen': 8},
+        {'page': '/1', 'hits': 5, 'seen': 9},
+    ]
+    assert buffer.stats.coalescing_ratio == 5.0
+    await client.close_pool()
+
+
+@pytest.mark.asyncio
+async def test_coalesces_tuple_rows_with_composite_key(database_config):
+    client = RecordingClient(database_config)
+    earlier, later = datetime(2020, 1, 1), datetime(2021, 1, 1)
+    buffer = client.write_behind('UPSERT', key=(0, 1), merge={2: max}, interval=60)
+    buffer.add(('a', 1, later))
+    buffer.add(('a', 1, earlier))
+    buffer.add(('a', 2, earlier))
+    await client.close_pool()
+    assert sorted(client.writes[0]) == [('a', 1, later), ('a', 2, earlier)]
+    assert client.write_behinds == []
+
+
+@pytest.mark.asyncio
+async def test_custom_merge_function(database_config):
+    client = RecordingClient(database_config)
+    buffer = WriteBehind(client, 'UPSERT', key=0, merge=lambda old, new: (new[0], old[1] * new[1]))
+    for value in (2, 3, 4):
+        buffer.add(('k', value))
+    await buffer.close()
+    assert client.writes == [[('k', 24)]]
+
+
+@pytest.mark.asyncio
+async def test_flushes_periodically(database_config):
+    async with RecordingClient(database_config) as client:
+        buffer = client.write_behind('UPSERT', key=0, merge=LAST, interval=0.01)
+        buffer.add(('k', 1))
+        await asyncio.sleep(0.05)
+        assert client.writes == [[('k', 1)]]
+        buffer.add(('k', 2))
+    assert client.writes == [[('k', 1)], [('k', 2)]]
+    assert buffer.stats.flushes == 2
+
+
+@pytest.mark.asyncio
+async def test_flushes_early_at_max_keys(database_config):
+    client = RecordingClient(database_config)
+    buffer = client.write_behind('UPSERT', key=0, interval=60, max_keys=3)
+    for i in range(3):
+        buffer.add((i,))
+    await asyncio.sleep(0.01)
+    assert len(client.writes) == 1 and len(buffer) == 0
+    await client.close_pool()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows(database_config):
+    client = RecordingClient(database_config, fail=1)
+    buffer = client.write_behind('UPSERT', key=0, merge={1: SUM}, interval=60)
+    buffer.add(('k', 1))
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+    buffer.add(('k', 2))
+    await client.close_pool()
+    assert client.writes == [[('k', 3)]]
+    assert buffer.stats.failed == 1
+    with pytest.raises(ValueError):
+        buffer.add(('k', 1))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('client_class', [AioPostgres, AioMySQL])
+async def test_close_pool_when_flush_fails(postgres_config, mysql_config, client_class):
+    config = postgres_config if client_class is AioPostgres else mysql_config
+    client = FakeDatabase().attach(client_class(config))
+    await client.setup_pool()
+    failing = client.write_behind('UPSERT', key='k', interval=60)
+    failing.client = RecordingClient(config, fail=1)
+    working = client.write_behind('UPSERT', key='k', interval=60)
+    failing.add({'k': 'a'})
+    working.add({'k': 'b'})
+    with pytest.raises(ConnectionError):
+        await client.close_pool()
+    assert failing.closed and working.closed and len(working) == 0
+    assert client.write_behinds == []
+    assert client.pool._closed